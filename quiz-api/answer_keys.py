@@ -0,0 +1,94 @@
+"""Clés de correction compilées par quiz (notation sans requête par réponse)."""
+import threading
+
+from models import db, Question, Choice, AppMeta
+
+
+class AnswerKey:
+    """Corrigé d'un quiz: question → choix dans l'ordre d'affichage et leur exactitude."""
+
+    def __init__(self, quiz_id, questions, choices):
+        self.quiz_id = quiz_id
+        # question_id → liste ordonnée des choice_id (ordre A/B/C/D)
+        self.choice_ids = {question_id: [] for question_id, _ in questions}
+        # position → question_id
+        self.question_at = {position: question_id for question_id, position in questions}
+        # choice_id → (question_id, is_correct)
+        self.choices = {}
+        for choice_id, question_id, is_correct in choices:
+            self.choice_ids[question_id].append(choice_id)
+            self.choices[choice_id] = (question_id, bool(is_correct))
+
+    @property
+    def total_questions(self):
+        return len(self.choice_ids)
+
+    def choice_at(self, question_id, index):
+        """choice_id du index-ième choix (0..n-1) d'une question, sinon None."""
+        ids = self.choice_ids.get(question_id)
+        if ids is None or index is None or not 0 <= index < len(ids):
+            return None
+        return ids[index]
+
+    def grade(self, question_id, choice_id):
+        """True/False selon la réponse, None si le choix n'appartient pas à la question."""
+        found = self.choices.get(choice_id)
+        if found is None or found[0] != question_id:
+            return None
+        return found[1]
+
+
+def _compile(quiz_id):
+    """Construit la clé d'un quiz en deux requêtes."""
+    questions = (db.session.query(Question.id, Question.position)
+                 .filter(Question.quiz_id == quiz_id)
+                 .all())
+    choices = (db.session.query(Choice.id, Choice.question_id, Choice.is_correct)
+               .join(Question, Question.id == Choice.question_id)
+               .filter(Question.quiz_id == quiz_id)
+               .order_by(Choice.question_id, Choice.position, Choice.id)
+               .all())
+    return AnswerKey(quiz_id, questions, choices)
+
+
+class AnswerKeyCache:
+    """Clés compilées en mémoire, invalidées par les mutations admin.
+
+    Comme le cache de réponses, vidé lorsque le jeton de version du contenu
+    en base change (écriture d'un autre processus).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._generation = 0
+        self._content_version = None
+
+    def get(self, quiz_id):
+        content_version = AppMeta.content_version()
+        with self._lock:
+            if content_version != self._content_version:
+                self._content_version = content_version
+                self._generation += 1
+                self._keys.clear()
+            key = self._keys.get(quiz_id)
+            generation = self._generation
+        if key is not None:
+            return key
+        key = _compile(quiz_id)
+        with self._lock:
+            # Ne pas mémoriser une clé compilée pendant une invalidation
+            if generation == self._generation:
+                self._keys[quiz_id] = key
+        return key
+
+    def invalidate(self, quiz_id=None):
+        with self._lock:
+            self._generation += 1
+            if quiz_id is None:
+                self._keys.clear()
+            else:
+                self._keys.pop(quiz_id, None)
+
+
+answer_keys = AnswerKeyCache()
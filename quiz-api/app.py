@@ -18,6 +18,10 @@ CORS(app)
 DB_PATH = os.path.join(os.path.dirname(__file__), "quiz.db")
 app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{DB_PATH}"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Images des questions: même stockage par empreinte que app_new (voir image_store)
+app.config["IMAGE_STORE_DIR"] = os.environ.get(
+    "IMAGE_STORE_DIR", os.path.join(os.path.dirname(__file__), "images")
+)
 
 # Initialisation ORM
 db = SQLAlchemy(app)
@@ -87,6 +91,9 @@ def health():
 
 from jwt_utils import decode_token, JwtError  # noqa: E402  pylint: disable=wrong-import-position
 from questions_service import create_question, update_question as update_question_service  # noqa: E402  pylint: disable=wrong-import-position
+from routes.image_routes import image_bp  # noqa: E402  pylint: disable=wrong-import-position
+
+app.register_blueprint(image_bp, url_prefix='/api/images')
 
 
 def _check_admin_token(auth_header: str | None):
@@ -1,11 +1,43 @@
 """Application Flask restructurée - Point d'entrée principal."""
 from flask import Flask
 from flask_cors import CORS
+from sqlalchemy import event
 from config import get_config
 from models import db
+from seed import seed_database
+from migrations import upgrade as upgrade_schema
+from cli import register_commands
+from attempt_writer import init_attempt_writer
+from leaderboard import leaderboards
 import os
 
 
+def _configure_sqlite(app):
+    """Applique SQLITE_PRAGMAS à chaque nouvelle connexion du pool."""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    if not pragmas or db.engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(db.engine, 'connect')
+    def _apply_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+def _seed_on_startup(app):
+    """Amorçage unique des questions; n'empêche jamais le démarrage."""
+    try:
+        report = seed_database()
+        if report is not None:
+            app.logger.info('Questions synced from data/questions.json: %d created, %d updated, %d deleted',
+                            len(report['created']), len(report['updated']), len(report['deleted']))
+    except Exception:  # noqa: BLE001
+        db.session.rollback()
+        app.logger.exception('Seeding from data/questions.json failed')
+
+
 def create_app(config_name='default'):
     """Factory pour créer l'application Flask."""
     app = Flask(__name__)
@@ -16,7 +48,7 @@ def create_app(config_name='default'):
     
     # Initialize extensions
     db.init_app(app)
-    CORS(app, origins=app.config['CORS_ORIGINS'])
+    CORS(app, origins=app.config['CORS_ORIGINS'], expose_headers=['X-Next-Cursor'])
     
     # Register blueprints
     from routes.auth_routes import auth_bp
@@ -26,6 +58,7 @@ def create_app(config_name='default'):
     from routes.leaderboard_routes import leaderboard_bp
     from routes.admin_routes import admin_bp
     from routes.legacy_routes import legacy_bp
+    from routes.image_routes import image_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(quiz_bp, url_prefix='/api/quizzes')
@@ -34,10 +67,19 @@ def create_app(config_name='default'):
     app.register_blueprint(leaderboard_bp, url_prefix='/api/leaderboard')
     app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(legacy_bp, url_prefix='/api')
+    app.register_blueprint(image_bp, url_prefix='/api/images')
     
     # Create tables
     with app.app_context():
+        _configure_sqlite(app)
         db.create_all()
+        upgrade_schema()
+        if app.config['SEED_ON_STARTUP']:
+            _seed_on_startup(app)
+        leaderboards.load()
+
+    init_attempt_writer(app)
+    register_commands(app)
     
     # Root route
     @app.route('/')
@@ -0,0 +1,218 @@
+"""Écriture des tentatives et de leurs réponses.
+
+Par défaut chaque requête écrit sa tentative dans sa propre transaction.
+Avec ATTEMPT_GROUP_COMMIT activé, les soumissions sont confiées à un
+écrivain unique qui en regroupe plusieurs dans une seule transaction
+(insertions multi-lignes), ce qui évite la contention sur le verrou
+d'écriture SQLite lors des pics de trafic.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import insert
+
+from models import db, Attempt, Answer
+from leaderboard import leaderboards, rank_entry
+import rollups
+
+
+class AttemptWriteTimeout(Exception):
+    """L'écrivain groupé n'a pas répondu à temps: la tentative peut encore être écrite."""
+
+
+class PendingAttempt:
+    """Tentative déjà notée, en attente d'écriture."""
+
+    def __init__(self, quiz_id, player_name, total_questions, score, time_spent, answers):
+        self.quiz_id = quiz_id
+        self.player_name = player_name
+        self.total_questions = total_questions
+        self.score = score
+        self.time_spent = time_spent
+        # [(question_id, choice_id, is_correct)]
+        self.answers = answers
+        self.created_at = datetime.utcnow()
+        self.future = Future()
+
+
+# Lignes par INSERT multi-lignes (sous la limite de 999 paramètres SQLite)
+ROWS_PER_INSERT = 150
+
+
+def _chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _write_batch(batch):
+    """Insère un lot de tentatives en une transaction; retourne leurs ids, dans l'ordre du lot.
+
+    SQLite ne garantit pas l'ordre de RETURNING d'un INSERT multi-lignes:
+    sort_by_parameter_order fait remettre les ids dans l'ordre des lignes.
+    """
+    attempt_rows = [
+        {
+            'quiz_id': p.quiz_id,
+            'player_name': p.player_name,
+            'score': p.score,
+            'total_questions': p.total_questions,
+            'time_spent': p.time_spent,
+            'created_at': p.created_at,
+        }
+        for p in batch
+    ]
+    attempts = Attempt.__table__
+    result = db.session.execute(insert(attempts).returning(attempts.c.id, sort_by_parameter_order=True),
+                                attempt_rows)
+    attempt_ids = result.scalars().all()
+    answer_rows = [
+        {
+            'attempt_id': attempt_id,
+            'question_id': question_id,
+            'choice_id': choice_id,
+            'is_correct': is_correct,
+            'timestamp': p.created_at,
+        }
+        for p, attempt_id in zip(batch, attempt_ids)
+        for question_id, choice_id, is_correct in p.answers
+    ]
+    for rows in _chunks(answer_rows, ROWS_PER_INSERT):
+        db.session.execute(insert(Answer).values(rows))
+    rollups.record([
+        (attempt_id, p.quiz_id, p.player_name, p.score, p.total_questions, p.time_spent, p.created_at)
+        for p, attempt_id in zip(batch, attempt_ids)
+    ])
+    db.session.commit()
+    return attempt_ids
+
+
+def _record_leaderboards(batch, attempt_ids):
+    """Reporte des tentatives commitées dans les classements en mémoire.
+
+    Appelé hors de la transaction: un échec ici ne doit pas faire réécrire
+    des tentatives déjà en base. Les classements sont alors simplement
+    reconstruits depuis la base à la prochaine lecture.
+    """
+    try:
+        leaderboards.record([
+            rank_entry(attempt_id, p.quiz_id, p.player_name, p.score, p.total_questions, p.time_spent, p.created_at)
+            for p, attempt_id in zip(batch, attempt_ids)
+        ])
+    except Exception:  # noqa: BLE001
+        current_app.logger.exception('Leaderboard update failed, rebuilding from the database')
+        leaderboards.invalidate()
+
+
+class GroupCommitWriter:
+    """Thread écrivain unique: vide la file par lots de `batch_size`
+    soumissions au plus, en attendant au plus `max_wait` secondes."""
+
+    def __init__(self, app, batch_size, max_wait):
+        self._app = app
+        self._batch_size = max(1, batch_size)
+        self._max_wait = max(0.0, max_wait)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        # Démarrage paresseux: les threads ne survivent pas au fork des workers
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = None
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='attempt-writer', daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def submit(self, pending):
+        self._ensure_started()
+        self._queue.put(pending)
+        return pending.future
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._max_wait
+        while len(batch) < self._batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                with self._app.app_context():
+                    self._flush(batch)
+            except Exception as exc:  # noqa: BLE001
+                # Erreur hors de _flush (contexte, session...): le lot échoue
+                # sans attendre le timeout et le thread continue
+                self._app.logger.exception('Attempt writer batch failed')
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(exc)
+
+    def _flush(self, batch):
+        try:
+            attempt_ids = _write_batch(batch)
+        except Exception:  # noqa: BLE001
+            # Le commit a échoué: rien n'est écrit. Isoler la soumission
+            # fautive en réécrivant les autres une par une
+            db.session.rollback()
+            for pending in batch:
+                try:
+                    attempt_id = _write_batch([pending])[0]
+                except Exception as exc:  # noqa: BLE001
+                    db.session.rollback()
+                    pending.future.set_exception(exc)
+                    continue
+                _record_leaderboards([pending], [attempt_id])
+                pending.future.set_result(attempt_id)
+            return
+        _record_leaderboards(batch, attempt_ids)
+        for pending, attempt_id in zip(batch, attempt_ids):
+            pending.future.set_result(attempt_id)
+
+
+def init_attempt_writer(app):
+    """Installe l'écrivain groupé si ATTEMPT_GROUP_COMMIT est activé."""
+    if app.config.get('ATTEMPT_GROUP_COMMIT'):
+        app.extensions['attempt_writer'] = GroupCommitWriter(
+            app,
+            batch_size=app.config['ATTEMPT_BATCH_SIZE'],
+            max_wait=app.config['ATTEMPT_BATCH_MAX_WAIT_MS'] / 1000.0,
+        )
+
+
+def save_attempt(quiz_id, player_name, total_questions, score, time_spent, answers):
+    """Persiste une tentative notée et retourne son id.
+
+    `answers` est une liste de (question_id, choice_id, is_correct). Avec
+    l'écrivain groupé, la session de la requête est d'abord commitée pour
+    rendre sa connexion au pool pendant l'attente; passé
+    ATTEMPT_WRITE_TIMEOUT, AttemptWriteTimeout est levée alors que
+    l'écrivain peut encore commiter la tentative.
+    """
+    pending = PendingAttempt(quiz_id, player_name, total_questions, score, time_spent, answers)
+    writer = current_app.extensions.get('attempt_writer')
+    if writer is None:
+        attempt_ids = _write_batch([pending])
+        _record_leaderboards([pending], attempt_ids)
+        return attempt_ids[0]
+    db.session.commit()
+    try:
+        return writer.submit(pending).result(timeout=current_app.config['ATTEMPT_WRITE_TIMEOUT'])
+    except TimeoutError:
+        raise AttemptWriteTimeout('Attempt is still being saved and may be recorded: do not resubmit') from None
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Benchmark de concurrence SQLite: débit de lecture pendant des écritures.
+
+Des threads écrivains soumettent des participations pendant que des threads
+lecteurs interrogent le classement, sur une base fichier temporaire. Le
+classement en mémoire est désactivé (LEADERBOARD_IN_MEMORY): chaque lecture
+passe par SQLite et se heurte aux écritures. Chaque profil (SQLITE_PRAGMAS de
+la configuration choisie) tourne dans son propre processus.
+
+    python bench_sqlite.py                      # compare development et production
+    python bench_sqlite.py --profile production --seconds 10 --readers 8
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Ajouter le répertoire courant au path pour importer les modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_profile(profile, seconds, readers, writers):
+    """Exécute le benchmark dans le processus courant (DATABASE_URL déjà défini)."""
+    from app_new import create_app
+
+    app = create_app(profile)
+    # Lectures servies par la base (_sql_page), pas par le classement en mémoire
+    app.config['LEADERBOARD_IN_MEMORY'] = False
+    deadline = time.monotonic() + seconds
+    stats = {'reads': 0, 'writes': 0, 'read_errors': 0, 'write_errors': 0}
+    read_latencies = []
+    lock = threading.Lock()
+
+    def writer(index):
+        client = app.test_client()
+        while time.monotonic() < deadline:
+            answers = [random.choice('ABCD') for _ in range(15)]
+            response = client.post('/api/participations', json={
+                'playerName': f'bench-{index}',
+                'answers': answers,
+            })
+            with lock:
+                stats['writes' if response.status_code == 200 else 'write_errors'] += 1
+
+    def reader():
+        client = app.test_client()
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            response = client.get('/api/leaderboard/1?limit=50')
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code == 200:
+                    stats['reads'] += 1
+                    read_latencies.append(elapsed)
+                else:
+                    stats['read_errors'] += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(
+        f"{profile:<12} lectures/s={stats['reads'] / seconds:8.1f} "
+        f"p95={_percentile(read_latencies, 95) * 1000:7.1f} ms "
+        f"écritures/s={stats['writes'] / seconds:7.1f} "
+        f"erreurs lecture={stats['read_errors']} écriture={stats['write_errors']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profile', action='append',
+                        help='Configuration à mesurer (répétable, défaut: development et production)')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_profile(args.profile[0], args.seconds, args.readers, args.writers)
+        return
+
+    for profile in args.profile or ['development', 'production']:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            subprocess.run([
+                sys.executable, os.path.abspath(__file__), '--child',
+                '--profile', profile,
+                '--seconds', str(args.seconds),
+                '--readers', str(args.readers),
+                '--writers', str(args.writers),
+            ], env=env, check=True)
+
+
+if __name__ == '__main__':
+    main()
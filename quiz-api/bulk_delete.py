@@ -0,0 +1,174 @@
+"""Suppressions massives par lots (cleanup des tentatives et des questions).
+
+Chaque lot couvre les DELETE_BATCH_SIZE plus petits ids restants et est
+commité seul, suivi d'une courte pause: le verrou d'écriture SQLite est
+rendu entre deux lots et les requêtes des joueurs passent entre-temps. Un
+lot supprime une tentative (ou une question) avec ses lignes dépendantes,
+la base reste donc cohérente à chaque commit.
+
+Les purges peuvent aussi tourner en tâche de fond (voir `purge_tasks`), leur
+progression étant consultable via /admin/tasks/<id>.
+"""
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from flask import current_app, jsonify, request, url_for
+from sqlalchemy import delete, select
+
+from models import db, Quiz, Question, Choice, Attempt, Answer, LeaderboardRollup
+from cache import invalidate_quiz
+from leaderboard import leaderboards, bump_attempts_version
+
+
+def _id_ranges(id_column, batch_size, table=None):
+    """Bornes (min, max) des `batch_size` plus petits ids restants, jusqu'à épuisement.
+
+    L'appelant supprime la plage avant de demander la suivante.
+    """
+    while True:
+        query = select(id_column).order_by(id_column).limit(batch_size)
+        if table is not None:
+            query = query.select_from(table)
+        ids = db.session.execute(query).scalars().all()
+        if not ids:
+            return
+        yield ids[0], ids[-1]
+
+
+def _end_batch():
+    db.session.commit()
+    pause_ms = current_app.config['DELETE_BATCH_PAUSE_MS']
+    if pause_ms:
+        time.sleep(pause_ms / 1000)
+
+
+def purge_attempts(progress=None):
+    """Supprime toutes les tentatives, leurs réponses et les classements par période.
+
+    `progress` (dict) reçoit les compteurs au fil des lots.
+    """
+    progress = {} if progress is None else progress
+    progress.update(attempts=0, answers=0, rollups=0)
+    batch_size = current_app.config['DELETE_BATCH_SIZE']
+    try:
+        for low, high in _id_ranges(Attempt.id, batch_size):
+            progress['answers'] += db.session.execute(
+                delete(Answer).where(Answer.attempt_id.between(low, high))).rowcount
+            progress['attempts'] += db.session.execute(
+                delete(Attempt).where(Attempt.id.between(low, high))).rowcount
+            # Dans la transaction du lot: les autres processus reconstruisent leurs classements
+            bump_attempts_version()
+            _end_batch()
+
+        # Clé primaire composite: découpage sur le rowid SQLite
+        rowid = db.literal_column('rowid')
+        for low, high in _id_ranges(rowid, batch_size, LeaderboardRollup.__table__):
+            progress['rollups'] += db.session.execute(
+                delete(LeaderboardRollup).where(rowid.between(low, high))).rowcount
+            _end_batch()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        # Des tentatives ont pu arriver pendant la purge: reconstruction depuis la base
+        leaderboards.invalidate()
+        invalidate_quiz()
+    return progress
+
+
+def purge_questions(progress=None):
+    """Supprime toutes les questions avec leurs choix et les réponses associées."""
+    progress = {} if progress is None else progress
+    progress.update(questions=0, choices=0, answers=0)
+    batch_size = current_app.config['DELETE_BATCH_SIZE']
+    try:
+        for low, high in _id_ranges(Question.id, batch_size):
+            progress['answers'] += db.session.execute(
+                delete(Answer).where(Answer.question_id.between(low, high))).rowcount
+            progress['choices'] += db.session.execute(
+                delete(Choice).where(Choice.question_id.between(low, high))).rowcount
+            progress['questions'] += db.session.execute(
+                delete(Question).where(Question.id.between(low, high))).rowcount
+            Quiz.refresh_question_counts()
+            _end_batch()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        invalidate_quiz()
+    return progress
+
+
+class PurgeTasks:
+    """Purges lancées en tâche de fond, consultables par id."""
+
+    # Nombre de tâches terminées conservées pour consultation
+    MAX_FINISHED = 50
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks = {}
+
+    def start(self, name, purge):
+        """Lance `purge(progress)` dans un thread avec le contexte de l'application."""
+        app = current_app._get_current_object()
+        task = {
+            'id': uuid.uuid4().hex,
+            'name': name,
+            'status': 'running',
+            'progress': {},
+            'error': None,
+            'started_at': datetime.utcnow().isoformat(),
+            'finished_at': None,
+        }
+        with self._lock:
+            self._forget_finished()
+            self._tasks[task['id']] = task
+
+        def run():
+            with app.app_context():
+                try:
+                    purge(task['progress'])
+                    task['status'] = 'done'
+                except Exception as e:  # noqa: BLE001
+                    db.session.rollback()
+                    task['status'] = 'failed'
+                    task['error'] = str(e)
+                finally:
+                    task['finished_at'] = datetime.utcnow().isoformat()
+
+        threading.Thread(target=run, name=f'purge-{name}', daemon=True).start()
+        return task
+
+    def get(self, task_id):
+        with self._lock:
+            task = self._tasks.get(task_id)
+            return None if task is None else dict(task, progress=dict(task['progress']))
+
+    def _forget_finished(self):
+        finished = [task_id for task_id, task in self._tasks.items() if task['status'] != 'running']
+        for task_id in finished[:max(0, len(finished) - self.MAX_FINISHED)]:
+            del self._tasks[task_id]
+
+
+purge_tasks = PurgeTasks()
+
+
+def purge_response(name, purge):
+    """Réponse des routes de purge: 204 une fois terminée, ou 202 avec `?background=true`.
+
+    Idempotent: purger une base déjà vide renvoie aussi 204.
+    """
+    if request.args.get('background', '').lower() == 'true':
+        task = purge_tasks.start(name, purge)
+        location = url_for('admin.get_task', task_id=task['id'])
+        return jsonify({"task_id": task['id'], "status_url": location}), 202, {'Location': location}
+    try:
+        purge()
+        return '', 204
+    except Exception as e:  # noqa: BLE001
+        # Les lots déjà commités restent supprimés: relancer termine la purge
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,134 @@
+"""Cache de réponses JSON pré-encodées, versionné par quiz, avec ETag/304."""
+import hashlib
+import threading
+import time
+from collections import namedtuple
+
+from flask import Response, current_app, request
+
+from answer_keys import answer_keys
+from models import db, AppMeta
+
+
+CacheEntry = namedtuple('CacheEntry', ['body', 'etag', 'quiz_id', 'version'])
+
+
+class ResponseCache:
+    """Corps JSON encodés, rattachés à un quiz et à la version de son contenu.
+
+    invalidate(quiz_id) incrémente la version du quiz (les entrées qui en
+    dépendent deviennent obsolètes sans être parcourues) ainsi que la
+    génération globale, qui sert de version aux listings multi-quiz.
+
+    Le cache vit dans le processus: chaque worker a sa propre copie. Les
+    écritures faites ailleurs (autre worker, `flask import-file`, seed) sont
+    vues par le jeton de version du contenu en base (AppMeta): s'il a changé
+    depuis la dernière lecture, tout le cache est vidé. Le jeton est lu au
+    plus une fois par RESPONSE_CACHE_VERSION_CHECK_SECONDS: entre deux
+    lectures, un succès ou un 304 ne touche pas la base, et une écriture
+    d'un autre processus peut rester invisible pendant ce délai.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._versions = {}
+        self._generation = 0
+        self._content_version = None
+        self._checked_at = None
+
+    def _sync_content_version(self):
+        now = time.monotonic()
+        interval = current_app.config['RESPONSE_CACHE_VERSION_CHECK_SECONDS']
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < interval:
+                return
+            self._checked_at = now
+        content_version = AppMeta.content_version()
+        with self._lock:
+            if content_version != self._content_version:
+                self._content_version = content_version
+                self._generation += 1
+                self._entries.clear()
+                self._versions.clear()
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def _current_version(self, quiz_id):
+        if quiz_id is None:
+            return self._generation
+        return self._versions.get(quiz_id, 0)
+
+    def lookup(self, key):
+        """Retourne l'entrée encore valide pour `key`, sinon None."""
+        if not current_app.config.get('RESPONSE_CACHE_ENABLED', True):
+            return None
+        self._sync_content_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.version != self._current_version(entry.quiz_id):
+                del self._entries[key]
+                return None
+            return entry
+
+    def store(self, key, body, quiz_id=None, generation=None):
+        """Enregistre un corps encodé; ignoré si une invalidation a eu lieu
+        depuis `generation` (le contenu lu est peut-être déjà périmé)."""
+        etag = hashlib.sha1(body).hexdigest()
+        with self._lock:
+            entry = CacheEntry(body, etag, quiz_id, self._current_version(quiz_id))
+            fresh = generation is None or generation == self._generation
+            if fresh and current_app.config.get('RESPONSE_CACHE_ENABLED', True):
+                self._entries[key] = entry
+        return entry
+
+    def invalidate(self, quiz_id=None):
+        """Rend obsolètes les réponses d'un quiz (ou de tous si quiz_id est None)."""
+        with self._lock:
+            self._generation += 1
+            if quiz_id is None:
+                self._entries.clear()
+                self._versions.clear()
+            else:
+                self._versions[quiz_id] = self._versions.get(quiz_id, 0) + 1
+
+
+response_cache = ResponseCache()
+
+
+def invalidate_quiz(quiz_id=None):
+    """À appeler après le commit de toute mutation du contenu d'un quiz.
+
+    Invalide les réponses en cache et la clé de correction compilée de ce
+    processus, puis change le jeton de version en base pour les autres.
+    """
+    response_cache.invalidate(quiz_id)
+    answer_keys.invalidate(quiz_id)
+    AppMeta.bump_content_version()
+    db.session.commit()
+
+
+def cached_json_response(key, build, cache_control='no-cache'):
+    """Sert `key` depuis le cache, sinon via build() -> (payload, quiz_id).
+
+    La réponse porte un ETag fort; un If-None-Match correspondant reçoit un
+    304 sans encodage JSON, avec pour seul accès éventuel à la base la
+    lecture périodique du jeton de version du contenu. Par défaut le client doit
+    toujours revalider (`cache_control`), le contenu pouvant changer à tout
+    moment côté admin.
+    """
+    entry = response_cache.lookup(key)
+    if entry is None:
+        generation = response_cache.generation
+        payload, quiz_id = build()
+        body = f"{current_app.json.dumps(payload)}\n".encode('utf-8')
+        entry = response_cache.store(key, body, quiz_id, generation)
+
+    response = Response(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
@@ -0,0 +1,98 @@
+"""Commandes CLI Flask (ex: flask --app app_new seed-db)."""
+import click
+
+from models import db
+from migrations import current_version, upgrade
+from query_plans import check_query_plans
+from question_import import import_file, parse_quiz_id
+from seed import ensure_default_quizzes, seed_database
+
+
+def echo_sync_report(report):
+    """Affiche le rapport de sync_questions()."""
+    for external_id in report['created']:
+        click.echo(f'+ {external_id}')
+    for update in report['updated']:
+        click.echo(f"~ {update['question']} ({', '.join(update['fields'])})")
+    for external_id in report['deleted']:
+        click.echo(f'- {external_id}')
+    click.echo(f"{len(report['created'])} créée(s), {len(report['updated'])} modifiée(s), "
+               f"{len(report['deleted'])} supprimée(s), {report['unchanged']} inchangée(s).")
+
+
+def register_commands(app):
+    """Enregistre les commandes d'administration sur l'application."""
+
+    @app.cli.command('seed-db')
+    @click.option('--force', is_flag=True, help='Réamorce même si questions.json est inchangé.')
+    @click.option('--dry-run', is_flag=True, help='Affiche les différences sans rien écrire.')
+    def seed_db_command(force, dry_run):
+        """Synchronise les quizzes 1..3 avec data/questions.json."""
+        try:
+            report = seed_database(force=force, dry_run=dry_run)
+        except Exception:
+            db.session.rollback()
+            raise
+        if report is None:
+            click.echo('Seed à jour, rien à faire.')
+            return
+        echo_sync_report(report)
+        click.echo('(simulation, aucune écriture)' if dry_run else 'Seed appliqué.')
+
+    @app.cli.command('db-upgrade')
+    def db_upgrade_command():
+        """Applique les migrations de schéma en attente."""
+        applied = upgrade()
+        for number, description in applied:
+            click.echo(f'Migration {number} appliquée: {description}')
+        click.echo(f'Schéma en version {current_version()}.')
+
+    @app.cli.command('check-query-plans')
+    def check_query_plans_command():
+        """Échoue si une requête chaude n'utilise pas son index (EXPLAIN QUERY PLAN)."""
+        problems = check_query_plans()
+        for problem in problems:
+            click.echo(problem, err=True)
+        if problems:
+            raise SystemExit(1)
+        click.echo('Plans de requêtes OK.')
+
+    @app.cli.command('import-file')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--workers', type=int, default=None, help="Processus d'analyse (défaut: nombre de CPU).")
+    @click.option('--chunk-size', type=int, default=None, help='Questions par transaction (défaut: IMPORT_CHUNK_SIZE).')
+    @click.option('--quiz-id', default=None, help='Quiz cible forcé (id ou alias: bases, roland, avance).')
+    def import_file_command(path, workers, chunk_size, quiz_id):
+        """Ajoute les questions d'un fichier CSV, NDJSON ou JSON."""
+        ensure_default_quizzes()
+        db.session.commit()
+
+        last_report = [0.0]
+
+        def progress(stats):
+            # Au plus une ligne de progression par seconde
+            if stats['seconds'] - last_report[0] < 1:
+                return
+            last_report[0] = stats['seconds']
+            click.echo(f"  {stats['read']} lue(s), {stats['inserted']} insérée(s), "
+                       f"{len(stats['errors'])} erreur(s)", err=True)
+
+        try:
+            stats = import_file(
+                path,
+                workers=workers,
+                chunk_size=chunk_size or app.config['IMPORT_CHUNK_SIZE'],
+                forced_quiz_id=parse_quiz_id(quiz_id) if quiz_id is not None else None,
+                on_progress=progress,
+            )
+        except Exception:
+            db.session.rollback()
+            raise
+        for error in stats['errors'][:20]:
+            click.echo(f"ligne {error['row']}: {error['error']}", err=True)
+        if len(stats['errors']) > 20:
+            click.echo(f"... {len(stats['errors']) - 20} autre(s) erreur(s)", err=True)
+        seconds = max(stats['seconds'], 1e-9)
+        click.echo(f"{stats['inserted']} question(s) insérée(s), {len(stats['errors'])} erreur(s) "
+                   f"sur {stats['read']} ligne(s) en {stats['seconds']:.2f} s "
+                   f"({stats['read'] / seconds:.0f} lignes/s, {stats['inserted'] / seconds:.0f} insertions/s).")
@@ -1,5 +1,6 @@
 """Configuration de l'application Flask."""
 import os
+import tempfile
 from datetime import timedelta
 
 class Config:
@@ -10,6 +11,12 @@ class Config:
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', f"sqlite:///{os.path.join(BASE_DIR, 'quiz.db')}")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Profil SQLite appliqué à chaque connexion du pool (PRAGMA nom = valeur)
+    SQLITE_PRAGMAS = {
+        'busy_timeout': 5000,  # ms d'attente du verrou avant "database is locked"
+        'foreign_keys': 'ON',  # ON DELETE CASCADE (désactivé par défaut dans SQLite)
+    }
     
     # JWT
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'Groupe 2')
@@ -29,6 +36,41 @@ class Config:
     DEFAULT_PAGE_SIZE = 50
     MAX_PAGE_SIZE = 100
 
+    # Cache des réponses JSON (quizzes/questions) avec ETag
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'True').lower() == 'true'
+    # Lecture du jeton de version du contenu en base au plus une fois par
+    # intervalle: les écritures des autres processus sont vues avec ce délai
+    RESPONSE_CACHE_VERSION_CHECK_SECONDS = float(os.environ.get('RESPONSE_CACHE_VERSION_CHECK_SECONDS', 1))
+
+    # Écriture groupée des tentatives (opt-in): un écrivain unique commit
+    # jusqu'à ATTEMPT_BATCH_SIZE soumissions par transaction, après au plus
+    # ATTEMPT_BATCH_MAX_WAIT_MS d'attente
+    ATTEMPT_GROUP_COMMIT = os.environ.get('ATTEMPT_GROUP_COMMIT', 'False').lower() == 'true'
+    ATTEMPT_BATCH_SIZE = int(os.environ.get('ATTEMPT_BATCH_SIZE', 100))
+    ATTEMPT_BATCH_MAX_WAIT_MS = int(os.environ.get('ATTEMPT_BATCH_MAX_WAIT_MS', 10))
+    ATTEMPT_WRITE_TIMEOUT = 30  # secondes d'attente maximale côté requête
+
+    # Classements servis depuis une structure triée en mémoire
+    LEADERBOARD_IN_MEMORY = os.environ.get('LEADERBOARD_IN_MEMORY', 'True').lower() == 'true'
+
+    # Import en masse (/admin/questions/bulk): questions par transaction
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 1000))
+
+    # Suppressions massives (cleanup): lignes par transaction et pause entre
+    # deux lots pour laisser passer les écritures des joueurs
+    DELETE_BATCH_SIZE = int(os.environ.get('DELETE_BATCH_SIZE', 1000))
+    DELETE_BATCH_PAUSE_MS = int(os.environ.get('DELETE_BATCH_PAUSE_MS', 5))
+
+    # Images de questions, stockées par empreinte SHA-256 (voir image_store)
+    IMAGE_STORE_DIR = os.environ.get('IMAGE_STORE_DIR', os.path.join(BASE_DIR, 'images'))
+
+    # Gabarits des bases vierges recopiés par /admin/rebuild et /api/rebuild-db
+    REBUILD_TEMPLATE_DIR = os.environ.get('REBUILD_TEMPLATE_DIR',
+                                          os.path.join(tempfile.gettempdir(), 'quiz-api-templates'))
+
+    # Amorçage depuis data/questions.json au démarrage (rejoué seulement si le fichier change)
+    SEED_ON_STARTUP = os.environ.get('SEED_ON_STARTUP', 'True').lower() == 'true'
+
 
 class DevelopmentConfig(Config):
     """Configuration de développement."""
@@ -42,6 +84,17 @@ class ProductionConfig(Config):
     TESTING = False
     RATELIMIT_ENABLED = True
 
+    # WAL: les lectures ne sont plus bloquées par les écritures en cours
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'busy_timeout': 5000,
+        'foreign_keys': 'ON',
+        'synchronous': 'NORMAL',  # sûr en WAL, fsync au checkpoint seulement
+        'cache_size': -20000,  # ~20 Mo (valeur négative = Kio)
+        'mmap_size': 268435456,  # 256 Mo
+        'temp_store': 'MEMORY',
+    }
+
 
 class TestingConfig(Config):
     """Configuration de test."""
@@ -0,0 +1,110 @@
+"""Stockage des images de questions sur disque, adressé par contenu (SHA-256).
+
+Une image envoyée en base64 (data URI) n'est plus conservée dans la ligne
+de la question: le fichier est écrit une fois sous IMAGE_STORE_DIR, nommé
+par l'empreinte de son contenu, et la colonne ne garde que sa référence
+(`/api/images/<sha256>.<ext>`). Le contenu d'une référence ne change
+jamais: les fichiers sont servis avec un cache immuable.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import re
+import uuid
+
+from flask import current_app
+
+
+URL_PREFIX = '/api/images/'
+
+EXTENSIONS = {
+    'image/png': '.png',
+    'image/jpeg': '.jpg',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/svg+xml': '.svg',
+}
+MIMETYPES = {extension: mimetype for mimetype, extension in EXTENSIONS.items()}
+
+# Signatures reconnues pour le base64 brut (sans préfixe data:)
+_MAGIC = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
+_DATA_URI = re.compile(r'^data:(image/[\w.+-]+);base64,', re.IGNORECASE)
+NAME_PATTERN = re.compile(r'^([0-9a-f]{64})(\.[a-z]+)$')
+
+# En deçà, une valeur sans préfixe data: est un chemin ou une URL
+_RAW_BASE64_MIN_LENGTH = 256
+
+
+def _sniff(data):
+    for magic, mimetype in _MAGIC:
+        if data.startswith(magic):
+            return mimetype
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def decode_inline(value):
+    """(octets, mimetype) d'une image en ligne (data URI ou base64 brut), sinon None."""
+    if not isinstance(value, str):
+        return None
+    match = _DATA_URI.match(value)
+    if match:
+        mimetype = match.group(1).lower()
+        payload = value[match.end():]
+    elif len(value) >= _RAW_BASE64_MIN_LENGTH and not value.startswith(('/', 'http:', 'https:')):
+        mimetype, payload = None, value
+    else:
+        return None
+    try:
+        data = base64.b64decode(''.join(payload.split()), validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    mimetype = mimetype or _sniff(data)
+    if mimetype not in EXTENSIONS:
+        return None
+    return data, mimetype
+
+
+def store_directory():
+    return current_app.config['IMAGE_STORE_DIR']
+
+
+def path_for(name):
+    """Chemin du fichier `name` (<sha256>.<ext>), réparti sur 256 sous-dossiers."""
+    return os.path.join(store_directory(), name[:2], name)
+
+
+def _name(data, mimetype):
+    return hashlib.sha256(data).hexdigest() + EXTENSIONS[mimetype]
+
+
+def store(data, mimetype):
+    """Écrit l'image si elle est absente et retourne sa référence (URL)."""
+    name = _name(data, mimetype)
+    path = path_for(name)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return URL_PREFIX + name
+
+
+def externalize(value, save=True):
+    """Remplace une image en ligne par sa référence; toute autre valeur est rendue telle quelle.
+
+    Avec save=False (simulation), la référence est calculée sans rien écrire.
+    """
+    inline = decode_inline(value)
+    if inline is None:
+        return value
+    return store(*inline) if save else URL_PREFIX + _name(*inline)
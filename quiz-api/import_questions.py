@@ -1,5 +1,13 @@
 #!/usr/bin/env python3
-"""Script pour importer les questions depuis le fichier JSON."""
+"""Script pour importer les questions depuis le fichier JSON.
+
+L'import est incrémental: les questions sont rapprochées par leur `id`
+(external_id) et seules les différences sont écrites. Relancer l'import
+d'un fichier inchangé ne modifie rien.
+
+    python import_questions.py            # applique
+    python import_questions.py --dry-run  # affiche les différences seulement
+"""
 import json
 import sys
 import os
@@ -8,18 +16,47 @@ import os
 sys.path.insert(0, os.path.dirname(__file__))
 
 from app_new import create_app, db
-from models import Quiz, Question, Choice
+from models import Quiz, AppMeta
+from question_import import sync_questions
+from cli import echo_sync_report
+
+# Propriétaire (questions.source) des questions synchronisées par ce script
+IMPORT_SOURCE = 'import_questions'
 
 
-def import_questions(json_file_path):
+def question_rows(questions_data, quiz_id):
+    """Payloads normalisés (voir question_import) du fichier JSON."""
+    rows = []
+    for idx, q_data in enumerate(questions_data, 1):
+        choices_dict = q_data['choices']
+        correct_letter = q_data['correct']
+        rows.append({
+            'external_id': q_data.get('id'),
+            'quiz_id': quiz_id,
+            'position': idx,
+            'title': f"Question {idx}",
+            'text': q_data['question'],
+            'image': q_data.get('image'),
+            'difficulty': q_data.get('difficulty', 'easy'),
+            'tags': json.dumps(q_data.get('tags', [])),
+            'explanation': q_data.get('explanation', ''),
+            'choices': [
+                {'text': choices_dict[letter], 'is_correct': letter == correct_letter}
+                for letter in ['A', 'B', 'C', 'D'] if letter in choices_dict
+            ],
+        })
+    return rows
+
+
+def import_questions(json_file_path, dry_run=False):
     """Importe les questions depuis un fichier JSON."""
     app = create_app('development')
-    
+
     with app.app_context():
         # Lire le fichier JSON
         with open(json_file_path, 'r', encoding='utf-8') as f:
             questions_data = json.load(f)
-        
+
         # Créer ou récupérer le quiz
         quiz = Quiz.query.filter_by(title='Quiz Tennis').first()
         if not quiz:
@@ -30,48 +67,26 @@ def import_questions(json_file_path):
                 is_published=True
             )
             db.session.add(quiz)
-            db.session.commit()
-            print(f"✅ Quiz créé : {quiz.title} (ID: {quiz.id})")
+            if dry_run:
+                db.session.flush()
+            else:
+                db.session.commit()
+                print(f"✅ Quiz créé : {quiz.title} (ID: {quiz.id})")
         else:
             print(f"ℹ️  Quiz existant trouvé : {quiz.title} (ID: {quiz.id})")
-            # Supprimer les anciennes questions si on réimporte
-            Question.query.filter_by(quiz_id=quiz.id).delete()
-            db.session.commit()
-            print("🗑️  Anciennes questions supprimées")
-        
-        # Importer chaque question
-        for idx, q_data in enumerate(questions_data, 1):
-            # Créer la question
-            question = Question(
-                quiz_id=quiz.id,
-                position=idx,
-                title=f"Question {idx}",
-                text=q_data['question'],
-                image=q_data.get('image'),  # Ajouter le champ image
-                difficulty=q_data.get('difficulty', 'easy'),
-                tags=json.dumps(q_data.get('tags', [])),
-                explanation=q_data.get('explanation', '')
-            )
-            db.session.add(question)
-            db.session.flush()  # Pour obtenir l'ID
-            
-            # Créer les choix
-            choices_dict = q_data['choices']
-            correct_letter = q_data['correct']
-            
-            for letter in ['A', 'B', 'C', 'D']:
-                if letter in choices_dict:
-                    choice = Choice(
-                        question_id=question.id,
-                        text=choices_dict[letter],
-                        is_correct=(letter == correct_letter)
-                    )
-                    db.session.add(choice)
-            
-            print(f"  ✓ Question {idx} importée")
-        
+
+        report = sync_questions(question_rows(questions_data, quiz.id), [quiz.id], IMPORT_SOURCE,
+                                dry_run=dry_run)
+        echo_sync_report(report)
+
+        if dry_run:
+            db.session.rollback()
+            print("\n🔎 Simulation terminée, aucune écriture.")
+            return
+        # L'API en cours d'exécution verra le changement (voir cache.py)
+        AppMeta.bump_content_version()
         db.session.commit()
-        print(f"\n🎉 Import terminé ! {len(questions_data)} questions importées.")
+        print(f"\n🎉 Import terminé ! {len(questions_data)} questions dans le fichier.")
 
 
 if __name__ == '__main__':
@@ -82,10 +97,9 @@ if __name__ == '__main__':
         'data',
         'questions.json'
     )
-    
+
     if not os.path.exists(json_path):
         print(f"❌ Erreur : Fichier {json_path} introuvable")
         sys.exit(1)
-    
-    import_questions(json_path)
 
+    import_questions(json_path, dry_run='--dry-run' in sys.argv[1:])
@@ -0,0 +1,273 @@
+"""Classements en mémoire (par quiz et global), maintenus incrémentalement.
+
+Construits une fois depuis la base au démarrage, puis mis à jour en
+O(log n) à chaque tentative commitée (voir attempt_writer). L'ordre est
+celui des routes de classement: score DESC, time_spent, created_at, id.
+
+Une seconde vue par quiz ne garde que la meilleure tentative de chaque
+joueur; le rang d'un joueur y est obtenu en O(log n) par bissection.
+
+La structure vit dans le processus. Pour voir les écritures des autres
+workers ou processus, chaque lecture la resynchronise en deux requêtes
+indexées: le jeton AppMeta `attempts.version`, changé par toute suppression
+de tentatives (reconstruction complète s'il a changé), puis les tentatives
+d'id supérieur au dernier lu. SQLite sérialisant les écritures, les ids sont
+commités dans l'ordre croissant: aucune tentative n'est sautée.
+Avec LEADERBOARD_IN_MEMORY désactivé, rien n'est chargé: les classements
+sont lus en base (fonctions de fenêtre SQL pour la vue par joueur).
+"""
+import threading
+from datetime import datetime
+
+from flask import current_app
+from sortedcontainers import SortedList
+from sqlalchemy import and_, desc, func, or_, tuple_
+
+import pagination
+from models import db, Attempt, AppMeta, ATTEMPTS_VERSION_KEY
+
+
+def rank_entry(attempt_id, quiz_id, player_name, score, total_questions, time_spent, created_at):
+    """Tuple ordonnable d'une tentative: les 4 premiers champs forment la clé de tri."""
+    return (
+        -(score or 0),
+        time_spent or 0,
+        created_at or datetime.min,
+        attempt_id,
+        quiz_id,
+        player_name,
+        score or 0,
+        total_questions,
+        time_spent,
+        created_at,
+    )
+
+
+def encode_cursor(entry):
+    """Curseur opaque désignant la position d'une entrée (clé de tri)."""
+    return pagination.encode_cursor(-entry[0], entry[1], entry[2], entry[3])
+
+
+def decode_cursor(cursor):
+    """Clé de tri (comparable aux rank_entry) d'un curseur; ValueError s'il est invalide."""
+    score, time_spent, created_at, attempt_id = pagination.decode_cursor(cursor, int, int, datetime, int)
+    return (-score, time_spent, created_at, attempt_id)
+
+
+def entry_to_dict(entry):
+    """Même représentation que Attempt.to_dict()."""
+    return Attempt.summary_dict(entry[3], entry[5], entry[6], entry[7], entry[8], entry[9])
+
+
+_ENTRY_COLUMNS = (Attempt.id, Attempt.quiz_id, Attempt.player_name, Attempt.score,
+                  Attempt.total_questions, Attempt.time_spent, Attempt.created_at)
+
+
+def _best_per_player(quiz_id):
+    """Requête (LEADERBOARD_IN_MEMORY désactivé): meilleure tentative de chaque joueur, classées."""
+    rank_order = (desc(Attempt.score), Attempt.time_spent, Attempt.created_at, Attempt.id)
+    attempts = (db.session.query(*_ENTRY_COLUMNS,
+                                 func.row_number().over(partition_by=Attempt.player_name,
+                                                        order_by=rank_order).label('player_rank'))
+                .filter(Attempt.quiz_id == quiz_id)
+                .subquery())
+    columns = [attempts.c[column.key] for column in _ENTRY_COLUMNS]
+    return (db.session.query(*columns)
+            .filter(attempts.c.player_rank == 1)
+            .order_by(desc(attempts.c.score), attempts.c.time_spent, attempts.c.created_at, attempts.c.id))
+
+
+def _ranked_dicts(rows, first_rank):
+    return [dict(entry_to_dict(rank_entry(*row)), rank=rank) for rank, row in enumerate(rows, start=first_rank)]
+
+
+def _sql_player_rank(quiz_id, player_name, around):
+    best = (db.session.query(*_ENTRY_COLUMNS)
+            .filter(Attempt.quiz_id == quiz_id, Attempt.player_name == player_name)
+            .order_by(desc(Attempt.score), Attempt.time_spent, Attempt.created_at, Attempt.id)
+            .first())
+    if best is None:
+        return None
+    # Joueurs dont au moins une tentative est mieux classée que la meilleure du joueur
+    index = (db.session.query(func.count(func.distinct(Attempt.player_name)))
+             .filter(Attempt.quiz_id == quiz_id, or_(
+                 Attempt.score > best.score,
+                 and_(Attempt.score == best.score,
+                      tuple_(Attempt.time_spent, Attempt.created_at, Attempt.id)
+                      < tuple_(best.time_spent, best.created_at, best.id)),
+             ))
+             .scalar())
+    total = (db.session.query(func.count(func.distinct(Attempt.player_name)))
+             .filter(Attempt.quiz_id == quiz_id)
+             .scalar())
+    start = max(0, index - around)
+    neighbours = _best_per_player(quiz_id).offset(start).limit(index - start + around + 1).all()
+    return {
+        'player_name': player_name,
+        'rank': index + 1,
+        'total_players': total,
+        'best': dict(entry_to_dict(rank_entry(*best)), rank=index + 1),
+        'around': _ranked_dicts(neighbours, start + 1),
+    }
+
+
+class RankedLeaderboards:
+    """Listes triées des tentatives, par quiz et toutes confondues."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        # Jeton attempts.version de la construction, plus grand id lu en base
+        self._version = None
+        self._synced_id = 0
+        self._by_quiz = {}
+        self._global = SortedList()
+        self._ids = set()
+        # Meilleure tentative par joueur: quiz_id -> SortedList, (quiz_id, joueur) -> entrée
+        self._best_by_quiz = {}
+        self._best_of = {}
+
+    @staticmethod
+    def enabled():
+        return current_app.config.get('LEADERBOARD_IN_MEMORY', True)
+
+    def _add(self, entry):
+        if entry[3] in self._ids:
+            return
+        self._ids.add(entry[3])
+        self._global.add(entry)
+        self._by_quiz.setdefault(entry[4], SortedList()).add(entry)
+
+        player_key = (entry[4], entry[5])
+        best = self._best_by_quiz.setdefault(entry[4], SortedList())
+        current = self._best_of.get(player_key)
+        if current is not None:
+            if current <= entry:
+                return
+            best.remove(current)
+        best.add(entry)
+        self._best_of[player_key] = entry
+
+    def _read_since(self, attempt_id):
+        """Ajoute les tentatives d'id > attempt_id lues en base; retourne le plus grand id lu."""
+        rows = (db.session.query(*_ENTRY_COLUMNS)
+                .filter(Attempt.id > attempt_id)
+                .order_by(Attempt.id)
+                .yield_per(1000))
+        for row in rows:
+            self._add(rank_entry(*row))
+            attempt_id = row.id
+        return attempt_id
+
+    def _ensure_loaded(self):
+        """Construit les classements, ou les resynchronise avec la base (voir l'en-tête)."""
+        version = AppMeta.version(ATTEMPTS_VERSION_KEY)
+        with self._lock:
+            if not self._loaded or version != self._version:
+                self._reset()
+                self._version = version
+                self._loaded = True
+            # Tentatives des autres processus (et les siennes, ignorées: déjà vues)
+            self._synced_id = self._read_since(self._synced_id)
+
+    def load(self):
+        """Construction initiale (create_app), depuis la base de cette application."""
+        if self.enabled():
+            self.invalidate()
+            self._ensure_loaded()
+
+    def record(self, entries):
+        """Ajoute des tentatives fraîchement commitées (tuples rank_entry).
+
+        Seulement pour les voir sans attendre la resynchronisation: celle-ci
+        les relira en base, dans l'ordre des ids.
+        """
+        with self._lock:
+            # Pas encore construit: la prochaine construction lira ces lignes en base
+            if not self._loaded:
+                return
+            for entry in entries:
+                self._add(entry)
+
+    def top(self, quiz_id=None, limit=50):
+        """Les `limit` premières tentatives d'un quiz (ou globales), en dicts."""
+        return [entry_to_dict(entry) for entry in self.page(quiz_id, limit)]
+
+    def page(self, quiz_id=None, limit=50, after=None):
+        """Entrées brutes qui suivent la clé `after` (decode_cursor), en O(log n)."""
+        self._ensure_loaded()
+        with self._lock:
+            ranked = self._global if quiz_id is None else self._by_quiz.get(quiz_id)
+            if not ranked:
+                return []
+            start = 0
+            if after is not None:
+                start = ranked.bisect_left(after)
+                if start < len(ranked) and ranked[start][:4] == after:
+                    start += 1
+            return ranked[start:start + max(0, limit)]
+
+    def top_players(self, quiz_id, limit=50):
+        """Meilleure tentative de chaque joueur d'un quiz, avec son rang."""
+        if not self.enabled():
+            return _ranked_dicts(_best_per_player(quiz_id).limit(max(0, limit)).all(), 1)
+        self._ensure_loaded()
+        with self._lock:
+            best = self._best_by_quiz.get(quiz_id, ())
+            return [dict(entry_to_dict(entry), rank=rank)
+                    for rank, entry in enumerate(best[:max(0, limit)], start=1)]
+
+    def player_rank(self, quiz_id, player_name, around=5):
+        """Rang d'un joueur (meilleure tentative) et les entrées qui l'entourent.
+
+        Retourne None si le joueur n'a aucune tentative sur ce quiz.
+        """
+        if not self.enabled():
+            return _sql_player_rank(quiz_id, player_name, around)
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._best_of.get((quiz_id, player_name))
+            if entry is None:
+                return None
+            best = self._best_by_quiz[quiz_id]
+            index = best.index(entry)
+            start = max(0, index - around)
+            neighbours = [dict(entry_to_dict(other), rank=rank)
+                          for rank, other in enumerate(best[start:index + around + 1], start=start + 1)]
+            return {
+                'player_name': player_name,
+                'rank': index + 1,
+                'total_players': len(best),
+                'best': dict(entry_to_dict(entry), rank=index + 1),
+                'around': neighbours,
+            }
+
+    def clear(self):
+        """Base recréée (rebuild): le signale aux autres processus, puis reconstruction.
+
+        Une base restaurée depuis un gabarit n'a pas de jeton attempts.version:
+        un nouveau est commité.
+        """
+        bump_attempts_version()
+        db.session.commit()
+        self.invalidate()
+
+    def invalidate(self):
+        """Suppressions dans ce processus: reconstruction à la prochaine lecture.
+
+        Les autres processus le voient au jeton attempts.version, que toute
+        suppression de tentatives doit changer (voir bump_attempts_version).
+        """
+        with self._lock:
+            self._loaded = False
+
+
+def bump_attempts_version():
+    """Signale une suppression de tentatives aux autres processus (sans commit)."""
+    AppMeta.bump_version(ATTEMPTS_VERSION_KEY)
+
+
+leaderboards = RankedLeaderboards()
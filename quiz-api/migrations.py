@@ -0,0 +1,207 @@
+"""Migrations de schéma versionnées (au démarrage ou via `flask db-upgrade`).
+
+create_all() crée les tables manquantes mais ne modifie jamais une table
+existante. Chaque évolution du schéma d'une base déjà en service est donc
+décrite ici, numérotée, et doit rester idempotente: une base neuve a déjà
+tout reçu de create_all() et ne fait qu'enregistrer la version.
+"""
+from sqlalchemy.schema import CreateTable
+
+from models import db, Quiz, AppMeta, LeaderboardRollup
+import image_store
+import rollups
+
+
+SCHEMA_VERSION_KEY = 'schema.version'
+
+
+def _column_names(table_name):
+    return {c['name'] for c in db.inspect(db.session.connection()).get_columns(table_name)}
+
+
+def _create_indexes(*names):
+    """Crée les index déclarés dans les modèles s'ils n'existent pas encore."""
+    conn = db.session.connection()
+    wanted = set(names)
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in wanted:
+                index.create(conn, checkfirst=True)
+                wanted.discard(index.name)
+    if wanted:
+        raise RuntimeError(f"Index inconnus: {', '.join(sorted(wanted))}")
+
+
+def _add_quiz_question_count():
+    if 'question_count' not in _column_names('quizzes'):
+        db.session.execute(db.text(
+            "ALTER TABLE quizzes ADD COLUMN question_count INTEGER NOT NULL DEFAULT 0"
+        ))
+        Quiz.refresh_question_counts()
+
+
+def _add_hot_path_indexes():
+    _create_indexes(
+        'ix_attempts_quiz_rank',
+        'ix_attempts_rank',
+        'ix_attempts_player',
+        'ix_answers_question_id',
+        'ix_answers_choice_id',
+        'ix_choices_question_id',
+    )
+
+
+def _add_leaderboard_rollups():
+    LeaderboardRollup.__table__.create(db.session.connection(), checkfirst=True)
+    _create_indexes('ix_rollups_rank')
+    rollups.backfill()
+
+
+def _add_legacy_scores_index():
+    _create_indexes('ix_attempts_quiz_score')
+
+
+def _add_question_external_id():
+    if 'external_id' not in _column_names('questions'):
+        db.session.execute(db.text("ALTER TABLE questions ADD COLUMN external_id VARCHAR(100)"))
+    _create_indexes('ix_questions_external_id')
+
+
+# Tables dont les clés étrangères passent en ON DELETE CASCADE
+CASCADE_TABLES = ('questions', 'attempts', 'choices', 'answers', 'leaderboard_rollups')
+
+
+def _has_cascading_foreign_keys(table_name):
+    foreign_keys = db.inspect(db.session.connection()).get_foreign_keys(table_name)
+    return all((fk.get('options') or {}).get('ondelete', '').upper() == 'CASCADE' for fk in foreign_keys)
+
+
+def _rebuild_table(conn, table):
+    """Recrée `table` selon le modèle en conservant ses lignes.
+
+    SQLite ne sait pas modifier une clé étrangère: procédure générale de
+    ALTER TABLE (nouvelle table, copie, DROP, RENAME, index).
+    """
+    new_name = f'{table.name}__new'
+    ddl = str(CreateTable(table).compile(dialect=conn.dialect))
+    conn.exec_driver_sql(ddl.replace(f'CREATE TABLE {table.name} (', f'CREATE TABLE {new_name} (', 1))
+    existing = {c['name'] for c in db.inspect(conn).get_columns(table.name)}
+    columns = ', '.join(f'"{c.name}"' for c in table.columns if c.name in existing)
+    conn.exec_driver_sql(f'INSERT INTO {new_name} ({columns}) SELECT {columns} FROM {table.name}')
+    conn.exec_driver_sql(f'DROP TABLE {table.name}')
+    conn.exec_driver_sql(f'ALTER TABLE {new_name} RENAME TO {table.name}')
+    for index in table.indexes:
+        index.create(conn)
+
+
+def _add_cascading_foreign_keys():
+    tables = [db.metadata.tables[name] for name in CASCADE_TABLES if not _has_cascading_foreign_keys(name)]
+    if not tables:
+        return
+    # Connexion dédiée: PRAGMA foreign_keys est ignoré dans une transaction, et
+    # un DROP TABLE avec les clés actives déclencherait les cascades
+    with db.engine.connect() as conn:
+        enabled = conn.exec_driver_sql('PRAGMA foreign_keys').scalar()
+        conn.exec_driver_sql('PRAGMA foreign_keys = OFF')
+        conn.commit()
+        if conn.exec_driver_sql('PRAGMA foreign_keys').scalar():
+            raise RuntimeError('Impossible de désactiver les clés étrangères pour la migration')
+        try:
+            # Les lignes orphelines existantes sont conservées telles quelles
+            for table in tables:
+                _rebuild_table(conn, table)
+            conn.commit()
+        finally:
+            conn.rollback()
+            conn.exec_driver_sql(f'PRAGMA foreign_keys = {"ON" if enabled else "OFF"}')
+            conn.commit()
+
+
+def _externalize_column(table_name, column, batch_size=100):
+    """Remplace les images base64 de `table_name.column` par leur référence (image_store)."""
+    conn = db.session.connection()
+    # Candidats: data URI ou longue valeur qui n'est ni un chemin ni une URL
+    ids = conn.exec_driver_sql(
+        f"SELECT id FROM {table_name} WHERE {column} LIKE 'data:%' OR length({column}) >= 256"
+    ).scalars().all()
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        rows = conn.execute(db.text(f"SELECT id, {column} FROM {table_name} WHERE id IN :ids")
+                            .bindparams(db.bindparam('ids', expanding=True)), {'ids': chunk}).all()
+        updates = []
+        for row_id, value in rows:
+            inline = image_store.decode_inline(value)
+            if inline is not None:
+                updates.append({'id': row_id, 'ref': image_store.store(*inline)})
+        if updates:
+            conn.execute(db.text(f"UPDATE {table_name} SET {column} = :ref WHERE id = :id"), updates)
+
+
+def _extract_inline_images():
+    _externalize_column('questions', 'image')
+    # Table de l'ancienne application (app.py), si elle partage la base
+    inspector = db.inspect(db.session.connection())
+    if 'question' in inspector.get_table_names() and 'image_b64' in _column_names('question'):
+        _externalize_column('question', 'image_b64')
+
+
+def _add_question_source():
+    # Les lignes existantes restent sans source: une synchronisation les
+    # adopte lorsqu'elle les retrouve, sans jamais supprimer les autres
+    if 'source' not in _column_names('questions'):
+        db.session.execute(db.text("ALTER TABLE questions ADD COLUMN source VARCHAR(50)"))
+
+
+def _add_choice_position():
+    if 'position' not in _column_names('choices'):
+        db.session.execute(db.text(
+            "ALTER TABLE choices ADD COLUMN position INTEGER NOT NULL DEFAULT 0"
+        ))
+    # Ordre existant: celui des ids (A/B/C/D historique). Aussi pour une table
+    # déjà recréée avec la colonne par la migration 6
+    db.session.execute(db.text(
+        "UPDATE choices SET position = 1 + (SELECT COUNT(*) FROM choices AS earlier "
+        "WHERE earlier.question_id = choices.question_id AND earlier.id < choices.id) "
+        "WHERE position = 0"
+    ))
+    _create_indexes('ix_choices_question_order')
+
+
+# (version, description, fonction) — ne jamais renuméroter ni modifier une
+# migration déjà publiée: en ajouter une nouvelle.
+MIGRATIONS = [
+    (1, 'quizzes.question_count dénormalisé', _add_quiz_question_count),
+    (2, 'index du classement, de l\'historique joueur et des réponses/choix', _add_hot_path_indexes),
+    (3, 'classements par fenêtre de temps (leaderboard_rollups)', _add_leaderboard_rollups),
+    (4, 'index des scores de l\'ancienne API quiz-info', _add_legacy_scores_index),
+    (5, 'questions.external_id (import incrémental)', _add_question_external_id),
+    (6, 'clés étrangères ON DELETE CASCADE', _add_cascading_foreign_keys),
+    (7, 'images base64 des questions vers le stockage par empreinte', _extract_inline_images),
+    (8, 'questions.source (propriétaire des questions synchronisées)', _add_question_source),
+    (9, 'choices.position (ordre d\'affichage des choix)', _add_choice_position),
+]
+
+
+def current_version():
+    return int(AppMeta.get_value(SCHEMA_VERSION_KEY, 0) or 0)
+
+
+def upgrade():
+    """Applique les migrations en attente, une transaction par version.
+
+    Retourne la liste des (version, description) appliquées.
+    """
+    applied = []
+    version = current_version()
+    for number, description, migrate in MIGRATIONS:
+        if number <= version:
+            continue
+        try:
+            migrate()
+            AppMeta.set_value(SCHEMA_VERSION_KEY, str(number))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        applied.append((number, description))
+    return applied
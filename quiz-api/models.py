@@ -1,4 +1,5 @@
 """Modèles SQLAlchemy pour l'application Quiz."""
+import uuid
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 
@@ -14,12 +15,17 @@ class Quiz(db.Model):
     description = db.Column(db.Text)
     difficulty = db.Column(db.String(20), default='easy')  # easy, medium, hard
     is_published = db.Column(db.Boolean, default=True)
+    # Compteur dénormalisé, maintenu par refresh_question_counts()
+    question_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relations
-    questions = db.relationship('Question', backref='quiz', lazy='dynamic', cascade='all, delete-orphan')
-    attempts = db.relationship('Attempt', backref='quiz', lazy='dynamic', cascade='all, delete-orphan')
+    # Suppressions en cascade faites par la base (ON DELETE CASCADE): l'ORM ne charge rien
+    questions = db.relationship('Question', backref='quiz', lazy='dynamic', cascade='all, delete-orphan',
+                                passive_deletes=True)
+    attempts = db.relationship('Attempt', backref='quiz', lazy='dynamic', cascade='all, delete-orphan',
+                               passive_deletes=True)
     
     def to_dict(self, include_questions=False):
         data = {
@@ -28,44 +34,70 @@ class Quiz(db.Model):
             'description': self.description,
             'difficulty': self.difficulty,
             'is_published': self.is_published,
-            'question_count': self.questions.count(),
+            'question_count': self.question_count or 0,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
         if include_questions:
-            data['questions'] = [q.to_dict() for q in self.questions.order_by(Question.position)]
+            data['questions'] = Question.serialize_many(self.questions.order_by(Question.position).all())
         return data
 
+    @classmethod
+    def refresh_question_counts(cls, quiz_ids=None):
+        """Recalcule question_count par un UPDATE ensembliste (sans commit).
+
+        À appeler après toute création/suppression de questions; quiz_ids=None
+        recalcule tous les quizzes.
+        """
+        count_subquery = (db.select(db.func.count(Question.id))
+                          .where(Question.quiz_id == cls.id)
+                          .scalar_subquery())
+        stmt = db.update(cls).values(question_count=count_subquery)
+        if quiz_ids is not None:
+            stmt = stmt.where(cls.id.in_(list(quiz_ids)))
+        db.session.execute(stmt)
+
 
 class Question(db.Model):
     """Modèle représentant une question du quiz."""
     __tablename__ = 'questions'
     
     id = db.Column(db.Integer, primary_key=True)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id', ondelete='CASCADE'), nullable=False)
     position = db.Column(db.Integer, nullable=False)
     title = db.Column(db.String(200), nullable=False)
     text = db.Column(db.Text, nullable=False)
-    image = db.Column(db.Text)  # URL ou base64
+    image = db.Column(db.Text)  # URL (les images base64 sont stockées par image_store)
     difficulty = db.Column(db.String(20), default='easy')
     tags = db.Column(db.Text)  # JSON array as string
     explanation = db.Column(db.Text)  # Explication de la réponse correcte
+    # Identifiant stable des fichiers d'import (ex: 'bases-1'), clé des mises à jour
+    external_id = db.Column(db.String(100))
+    # Import de référence propriétaire de la question ('seed', ...): seul
+    # celui-ci peut la supprimer quand elle disparaît de son fichier
+    source = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relations
-    choices = db.relationship('Choice', backref='question', lazy='dynamic', cascade='all, delete-orphan')
-    answers = db.relationship('Answer', backref='question', lazy='dynamic', cascade='all, delete-orphan')
+    choices = db.relationship('Choice', backref='question', lazy='dynamic', cascade='all, delete-orphan',
+                              passive_deletes=True)
+    answers = db.relationship('Answer', backref='question', lazy='dynamic', cascade='all, delete-orphan',
+                              passive_deletes=True)
     
     __table_args__ = (db.UniqueConstraint('quiz_id', 'position', name='uq_quiz_position'),)
     
-    def to_dict(self, include_correct=False):
-        """Convertit en dictionnaire. include_correct pour admin seulement."""
+    def to_dict(self, include_correct=False, choices=None):
+        """Convertit en dictionnaire. include_correct pour admin seulement.
+
+        `choices` permet de fournir des choix déjà chargés (voir serialize_many)
+        pour éviter une requête par question.
+        """
         import json
-        # Fallback image si absente en base: construit à partir de position + difficulté
-        difficulty = (self.difficulty or 'easy').lower()
-        suffix = 'base' if difficulty == 'easy' else difficulty
-        image_url = self.image or f"/images/questions/q{self.position}{suffix}.png"
+        if choices is None:
+            choices = self.choices.order_by(Choice.position, Choice.id).all()
+        image_url = self.image_url
         data = {
             'id': self.id,
+            'external_id': self.external_id,
             'quiz_id': self.quiz_id,
             'position': self.position,
             'title': self.title,
@@ -74,7 +106,7 @@ class Question(db.Model):
             'difficulty': self.difficulty,
             'tags': json.loads(self.tags) if self.tags else [],
             # Legacy pour TDD
-            'possibleAnswers': [c.to_dict(include_correct) for c in self.choices],
+            'possibleAnswers': [c.to_dict(include_correct) for c in choices],
             # Alias pour le front moderne
             'choices': [
                 {
@@ -82,26 +114,174 @@ class Question(db.Model):
                     'text': c.text,
                     'is_correct': bool(c.is_correct) if include_correct else False
                 }
-                for c in self.choices
+                for c in choices
             ]
         }
         if include_correct and self.explanation:
             data['explanation'] = self.explanation
         return data
 
+    @property
+    def image_url(self):
+        """Image de la question; fallback construit à partir de position + difficulté."""
+        difficulty = (self.difficulty or 'easy').lower()
+        suffix = 'base' if difficulty == 'easy' else difficulty
+        return self.image or f"/images/questions/q{self.position}{suffix}.png"
+
+    # Champs publics sélectionnables par ?fields= -> colonnes à charger (id toujours chargé)
+    LISTING_FIELDS = {
+        'id': (),
+        'external_id': ('external_id',),
+        'quiz_id': ('quiz_id',),
+        'position': ('position',),
+        'title': ('title',),
+        'text': ('text',),
+        'image': ('image', 'position', 'difficulty'),
+        'difficulty': ('difficulty',),
+        'tags': ('tags',),
+        'possibleAnswers': (),
+        'choices': (),
+    }
+
+    @classmethod
+    def listing_columns(cls, fields):
+        """Colonnes à charger (load_only) pour `fields`, plus la clé de pagination."""
+        names = {'quiz_id', 'position'}
+        for field in fields:
+            names.update(cls.LISTING_FIELDS[field])
+        return [getattr(cls, name) for name in sorted(names)]
+
+    def to_sparse_dict(self, fields, choices=()):
+        """Sous-ensemble `fields` de to_dict() (sans bonnes réponses).
+
+        Ne lit que les colonnes de LISTING_FIELDS correspondantes: compatible
+        avec une requête load_only(listing_columns(fields)).
+        """
+        import json
+        data = {}
+        for field in fields:
+            if field == 'image':
+                data[field] = self.image_url
+            elif field == 'tags':
+                data[field] = json.loads(self.tags) if self.tags else []
+            elif field == 'possibleAnswers':
+                data[field] = [c.to_dict() for c in choices]
+            elif field == 'choices':
+                data[field] = [{'id': c.id, 'text': c.text, 'is_correct': False} for c in choices]
+            else:
+                data[field] = getattr(self, field)
+        return data
+
+    @staticmethod
+    def serialize_many(questions, include_correct=False, fields=None):
+        """Sérialise une liste de questions avec un nombre constant de requêtes.
+
+        Les choix de toutes les questions sont chargés en lot puis distribués,
+        au lieu de parcourir la relation dynamique `choices` pour chaque ligne.
+        Avec `fields` (voir to_sparse_dict), les choix ne sont chargés que
+        s'ils sont demandés.
+        """
+        if fields is not None:
+            wants_choices = 'choices' in fields or 'possibleAnswers' in fields
+            choices_by_question = Choice.load_for_questions([q.id for q in questions]) if wants_choices else {}
+            return [q.to_sparse_dict(fields, choices_by_question.get(q.id, [])) for q in questions]
+        choices_by_question = Choice.load_for_questions([q.id for q in questions])
+        return [
+            q.to_dict(include_correct, choices=choices_by_question.get(q.id, []))
+            for q in questions
+        ]
+
+    @classmethod
+    def shift_positions(cls, quiz_id, start, end=None, delta=1):
+        """Décale de `delta` les positions start..end (end=None: jusqu'à la fin) du quiz.
+
+        Deux UPDATE ensemblistes quel que soit le nombre de lignes (sans commit):
+        les positions sont d'abord passées en négatif, ce qui évite toute
+        collision transitoire sur uq_quiz_position, puis rétablies.
+        """
+        in_range = [cls.quiz_id == quiz_id, cls.position >= start]
+        if end is not None:
+            in_range.append(cls.position <= end)
+        db.session.execute(db.update(cls).where(*in_range).values(position=-(cls.position + delta)))
+        db.session.execute(db.update(cls)
+                           .where(cls.quiz_id == quiz_id, cls.position < 0)
+                           .values(position=-cls.position))
+
+    @classmethod
+    def apply_order(cls, quiz_id, question_ids):
+        """Renumérote 1..N les questions du quiz dans l'ordre de `question_ids` (sans commit).
+
+        `question_ids` doit contenir exactement les questions du quiz (ValueError sinon).
+        """
+        current = set(db.session.execute(db.select(cls.id).where(cls.quiz_id == quiz_id)).scalars())
+        if len(question_ids) != len(current) or set(question_ids) != current:
+            raise ValueError('question_ids must list every question of the quiz exactly once')
+        db.session.execute(db.update(cls).where(cls.quiz_id == quiz_id).values(position=-cls.position))
+        # UPDATE par clé primaire en executemany
+        db.session.execute(db.update(cls), [
+            {'id': question_id, 'position': position}
+            for position, question_id in enumerate(question_ids, start=1)
+        ])
+
+
+# Clé de l'import incrémental, unique par quiz (les questions créées à la main restent à NULL)
+db.Index('ix_questions_external_id', Question.quiz_id, Question.external_id, unique=True)
+
 
 class Choice(db.Model):
     """Modèle représentant un choix de réponse."""
     __tablename__ = 'choices'
     
     id = db.Column(db.Integer, primary_key=True)
-    question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False, index=True)
     text = db.Column(db.Text, nullable=False)
     is_correct = db.Column(db.Boolean, default=False)
+    # Ordre d'affichage (A/B/C/D): réordonner les choix ne touche ni leurs ids
+    # ni leur texte, auxquels renvoient les réponses enregistrées
+    position = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relations
-    answers = db.relationship('Answer', backref='choice', lazy='dynamic')
+    answers = db.relationship('Answer', backref='choice', lazy='dynamic', passive_deletes=True)
+
+    # Borne sous SQLITE_MAX_VARIABLE_NUMBER (999 sur les anciennes versions)
+    IN_CLAUSE_CHUNK = 900
+
+    @classmethod
+    def load_for_questions(cls, question_ids):
+        """Charge les choix de plusieurs questions, groupés par question_id.
+
+        Une seule requête par tranche de IN_CLAUSE_CHUNK questions; les choix
+        sont triés dans l'ordre d'affichage (position, puis id).
+        """
+        grouped = {}
+        ids = list(question_ids)
+        for start in range(0, len(ids), cls.IN_CLAUSE_CHUNK):
+            chunk = ids[start:start + cls.IN_CLAUSE_CHUNK]
+            rows = cls.query.filter(cls.question_id.in_(chunk)).order_by(cls.position, cls.id).all()
+            for choice in rows:
+                grouped.setdefault(choice.question_id, []).append(choice)
+        return grouped
+
+    @staticmethod
+    def match(current, wanted):
+        """Rapproche les choix existants `current` des choix demandés `wanted`.
+
+        Un choix demandé est repris par son `id` s'il en porte un, sinon par
+        son texte (premier choix restant identique), jamais par son rang:
+        un réordonnancement ne change que les positions. Retourne la liste,
+        alignée sur `wanted`, des choix repris (None pour un nouveau choix).
+        """
+        remaining = {c.id: c for c in current}
+        matches = []
+        for item in wanted:
+            choice = remaining.pop(item['id'], None) if item.get('id') is not None else None
+            if choice is None:
+                choice = next((c for c in remaining.values() if c.text == item['text']), None)
+                if choice is not None:
+                    del remaining[choice.id]
+            matches.append(choice)
+        return matches
     
     def to_dict(self, include_correct=False):
         """Convertit en dictionnaire. Expose toujours 'isCorrect' (false par défaut)."""
@@ -112,12 +292,16 @@ class Choice(db.Model):
         }
 
 
+# Choix d'une question dans l'ordre d'affichage (l'id, rowid, termine l'index)
+db.Index('ix_choices_question_order', Choice.question_id, Choice.position)
+
+
 class Attempt(db.Model):
     """Modèle représentant une tentative de quiz par un joueur."""
     __tablename__ = 'attempts'
     
     id = db.Column(db.Integer, primary_key=True)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id', ondelete='CASCADE'), nullable=False)
     player_name = db.Column(db.String(100), nullable=False)
     score = db.Column(db.Integer, default=0)
     total_questions = db.Column(db.Integer, nullable=False)
@@ -125,31 +309,69 @@ class Attempt(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relations
-    answers = db.relationship('Answer', backref='attempt', lazy='dynamic', cascade='all, delete-orphan')
+    answers = db.relationship('Answer', backref='attempt', lazy='dynamic', cascade='all, delete-orphan',
+                              passive_deletes=True)
     
     def to_dict(self, include_answers=False):
-        data = {
-            'id': self.id,
-            'player_name': self.player_name,
-            'score': self.score,
-            'total_questions': self.total_questions,
-            'percentage': round((self.score / self.total_questions * 100), 2) if self.total_questions > 0 else 0,
-            'time_spent': self.time_spent,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+        data = Attempt.summary_dict(self.id, self.player_name, self.score, self.total_questions,
+                                    self.time_spent, self.created_at)
         if include_answers:
             data['answers'] = [a.to_dict() for a in self.answers]
         return data
 
+    def review_dict(self):
+        """Tentative avec ses réponses et le texte des questions et choix concernés.
+
+        Deux requêtes quel que soit le nombre de questions: réponses jointes à
+        leurs questions, puis les choix de ces questions en lot.
+        """
+        rows = (db.session.query(Answer, Question)
+                .join(Question, Answer.question_id == Question.id)
+                .filter(Answer.attempt_id == self.id)
+                .order_by(Question.position)
+                .all())
+        choices_by_question = Choice.load_for_questions([question.id for _, question in rows])
+        data = self.to_dict()
+        data['quiz_id'] = self.quiz_id
+        data['answers'] = [
+            dict(answer.to_dict(),
+                 question=question.to_dict(include_correct=True,
+                                           choices=choices_by_question.get(question.id, [])))
+            for answer, question in rows
+        ]
+        return data
+
+    @staticmethod
+    def summary_dict(attempt_id, player_name, score, total_questions, time_spent, created_at):
+        """Représentation publique d'une tentative à partir de ses colonnes."""
+        return {
+            'id': attempt_id,
+            'player_name': player_name,
+            'score': score,
+            'total_questions': total_questions,
+            'percentage': round((score / total_questions * 100), 2) if total_questions > 0 else 0,
+            'time_spent': time_spent,
+            'created_at': created_at.isoformat() if created_at else None
+        }
+
+
+# Index du classement: ORDER BY score DESC, time_spent, created_at (par quiz et global)
+db.Index('ix_attempts_quiz_rank', Attempt.quiz_id, Attempt.score.desc(), Attempt.time_spent, Attempt.created_at)
+db.Index('ix_attempts_rank', Attempt.score.desc(), Attempt.time_spent, Attempt.created_at)
+# Scores de l'ancienne API quiz-info: ORDER BY score DESC, id
+db.Index('ix_attempts_quiz_score', Attempt.quiz_id, Attempt.score.desc())
+# Historique d'un joueur
+db.Index('ix_attempts_player', Attempt.player_name, Attempt.created_at)
+
 
 class Answer(db.Model):
     """Modèle représentant une réponse individuelle dans une tentative."""
     __tablename__ = 'answers'
     
     id = db.Column(db.Integer, primary_key=True)
-    attempt_id = db.Column(db.Integer, db.ForeignKey('attempts.id'), nullable=False)
-    question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=False)
-    choice_id = db.Column(db.Integer, db.ForeignKey('choices.id'), nullable=False)
+    attempt_id = db.Column(db.Integer, db.ForeignKey('attempts.id', ondelete='CASCADE'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False, index=True)
+    choice_id = db.Column(db.Integer, db.ForeignKey('choices.id', ondelete='CASCADE'), nullable=False, index=True)
     is_correct = db.Column(db.Boolean, default=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -164,3 +386,84 @@ class Answer(db.Model):
             'timestamp': self.timestamp.isoformat() if self.timestamp else None
         }
 
+
+class LeaderboardRollup(db.Model):
+    """Meilleure tentative d'un joueur sur un quiz, par fenêtre de temps.
+
+    Une ligne par (fenêtre, période, quiz, joueur), mise à jour à chaque
+    tentative; les classements par fenêtre ne lisent jamais `attempts`.
+    """
+    __tablename__ = 'leaderboard_rollups'
+    
+    window = db.Column(db.String(10), primary_key=True)  # day, week, month, all
+    bucket = db.Column(db.String(10), primary_key=True)  # 2025-03-14, 2025-W11, 2025-03, all
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id', ondelete='CASCADE'), primary_key=True)
+    player_name = db.Column(db.String(100), primary_key=True)
+    attempt_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Integer, nullable=False)
+    total_questions = db.Column(db.Integer, nullable=False)
+    time_spent = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    attempts_count = db.Column(db.Integer, nullable=False, default=1)
+    
+    def to_dict(self):
+        data = Attempt.summary_dict(self.attempt_id, self.player_name, self.score, self.total_questions,
+                                    self.time_spent, self.created_at)
+        data['attempts_count'] = self.attempts_count
+        return data
+
+
+# Classement d'une période: ORDER BY score DESC, time_spent, created_at
+db.Index('ix_rollups_rank', LeaderboardRollup.window, LeaderboardRollup.bucket, LeaderboardRollup.quiz_id,
+         LeaderboardRollup.score.desc(), LeaderboardRollup.time_spent, LeaderboardRollup.created_at)
+
+
+class AppMeta(db.Model):
+    """Paires clé/valeur internes (empreinte du seed, etc.)."""
+    __tablename__ = 'app_meta'
+
+    key = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.Text)
+
+    @classmethod
+    def get_value(cls, key, default=None):
+        row = cls.query.get(key)
+        return row.value if row else default
+
+    @classmethod
+    def set_value(cls, key, value):
+        """Crée ou met à jour la clé (le commit reste à la charge de l'appelant)."""
+        db.session.merge(cls(key=key, value=value))
+
+    @classmethod
+    def version(cls, key):
+        """Jeton de version `key`, lu en base (pas dans la session)."""
+        return db.session.execute(db.select(cls.value).where(cls.key == key)).scalar()
+
+    @classmethod
+    def bump_version(cls, key):
+        """Change le jeton de version `key` (le commit reste à la charge de l'appelant).
+
+        Un jeton aléatoire plutôt qu'un compteur: une base restaurée depuis un
+        gabarit ne peut pas retomber sur une version déjà vue.
+        """
+        cls.set_value(key, uuid.uuid4().hex)
+
+    @classmethod
+    def content_version(cls):
+        """Jeton de version du contenu des quizzes."""
+        return cls.version(CONTENT_VERSION_KEY)
+
+    @classmethod
+    def bump_content_version(cls):
+        cls.bump_version(CONTENT_VERSION_KEY)
+
+
+# Changé par chaque écriture du contenu (questions, choix, quizzes), quel que
+# soit le processus: les caches en mémoire (cache.py, answer_keys.py) le
+# comparent pour voir les imports CLI et les écritures des autres workers
+CONTENT_VERSION_KEY = 'content.version'
+
+# Changé par chaque suppression de tentatives (purges, suppression d'un
+# quiz): les classements en mémoire (leaderboard.py) sont alors reconstruits
+ATTEMPTS_VERSION_KEY = 'attempts.version'
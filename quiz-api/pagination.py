@@ -0,0 +1,30 @@
+"""Curseurs opaques pour la pagination par clé (keyset).
+
+Un curseur encode les valeurs de la clé de tri de la dernière ligne d'une
+page; la page suivante reprend strictement après, quel que soit sa
+profondeur.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+
+def encode_cursor(*values):
+    """Curseur opaque (base64 url) pour une liste de valeurs JSON ou datetime."""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values],
+                     separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, *types):
+    """Valeurs d'un curseur converties par `types` (int, datetime...);
+    ValueError s'il est invalide."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError('Invalid cursor')
+        return [datetime.fromisoformat(v) if t is datetime else t(v) for t, v in zip(types, values)]
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
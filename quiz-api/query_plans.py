@@ -0,0 +1,118 @@
+"""Vérification des plans d'exécution SQLite des requêtes chaudes.
+
+Chaque requête doit utiliser l'index attendu et ne pas trier via une
+B-tree temporaire; tests/test_query_plans.py et `flask check-query-plans`
+échouent sinon.
+"""
+from models import db
+
+
+# (libellé, SQL, index attendu, éventuellement suivi des contraintes de recherche
+# affichées par EXPLAIN — None: une recherche indexée quelconque)
+HOT_QUERIES = [
+    (
+        'classement par quiz',
+        "SELECT * FROM attempts WHERE quiz_id = 1 "
+        "ORDER BY score DESC, time_spent ASC, created_at ASC LIMIT 50",
+        'ix_attempts_quiz_rank',
+    ),
+    (
+        'classement global',
+        "SELECT * FROM attempts ORDER BY score DESC, time_spent ASC, created_at ASC LIMIT 50",
+        'ix_attempts_rank',
+    ),
+    (
+        # keyset de routes.leaderboard_routes._sql_page: intervalle sur score exigé
+        'page suivante du classement (keyset)',
+        "SELECT * FROM attempts WHERE quiz_id = 1 AND score <= :score AND (score < :score OR "
+        "(time_spent, created_at, id) > (:time_spent, :created_at, :id)) "
+        "ORDER BY score DESC, time_spent ASC, created_at ASC, id ASC LIMIT 50",
+        'ix_attempts_quiz_rank (quiz_id=? AND score<?)',
+    ),
+    (
+        'page suivante du classement global (keyset)',
+        "SELECT * FROM attempts WHERE score <= :score AND (score < :score OR "
+        "(time_spent, created_at, id) > (:time_spent, :created_at, :id)) "
+        "ORDER BY score DESC, time_spent ASC, created_at ASC, id ASC LIMIT 50",
+        'ix_attempts_rank (score<?)',
+    ),
+    (
+        'classement d\'une période',
+        "SELECT * FROM leaderboard_rollups WHERE window = 'day' AND bucket = '2025-01-01' "
+        "AND quiz_id = 1 ORDER BY score DESC, time_spent ASC, created_at ASC LIMIT 50",
+        'ix_rollups_rank',
+    ),
+    (
+        'scores quiz-info (ancienne API)',
+        "SELECT player_name, score FROM attempts WHERE quiz_id = 1 "
+        "ORDER BY score DESC, id ASC LIMIT 100 OFFSET 0",
+        'ix_attempts_quiz_score',
+    ),
+    (
+        'historique joueur',
+        "SELECT * FROM attempts WHERE player_name = 'alice' ORDER BY created_at DESC, id DESC LIMIT 50",
+        'ix_attempts_player',
+    ),
+    (
+        'historique joueur (page suivante, filtré par quiz)',
+        "SELECT * FROM attempts WHERE player_name = 'alice' AND quiz_id = 1 "
+        "AND (created_at < '2025-01-01' OR (created_at = '2025-01-01' AND id < 10)) "
+        "ORDER BY created_at DESC, id DESC LIMIT 50",
+        'ix_attempts_player',
+    ),
+    (
+        # index implicite de la contrainte uq_quiz_position (sqlite_autoindex_*)
+        'listing des questions (page suivante)',
+        "SELECT id, quiz_id, position, title FROM questions "
+        "WHERE (quiz_id, position) > (1, 50) ORDER BY quiz_id, position LIMIT 50",
+        None,
+    ),
+    (
+        'choix d\'une question',
+        "SELECT * FROM choices WHERE question_id = 1 ORDER BY position, id",
+        'ix_choices_question_order',
+    ),
+    (
+        'réponses d\'une question',
+        "SELECT * FROM answers WHERE question_id = 1",
+        'ix_answers_question_id',
+    ),
+    (
+        # index implicite de la contrainte uq_attempt_question (sqlite_autoindex_*)
+        'réponses d\'une tentative',
+        "SELECT * FROM answers WHERE attempt_id = 1",
+        None,
+    ),
+]
+
+
+# Valeurs des paramètres (:nom) des requêtes: liés comme par l'application,
+# sans quoi SQLite peut tirer des littéraux un intervalle que le SQL réel n'a pas
+PARAMETERS = {'score': 5, 'time_spent': 10, 'created_at': '2025-01-01', 'id': 3}
+
+
+def explain(sql):
+    """Lignes de détail de EXPLAIN QUERY PLAN pour une requête."""
+    params = {name: value for name, value in PARAMETERS.items() if f':{name}' in sql}
+    rows = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}"), params).all()
+    return [row[-1] for row in rows]
+
+
+def check_query_plan(label, sql, index_name):
+    """Problème détecté sur le plan d'une requête de HOT_QUERIES, sinon None."""
+    details = explain(sql)
+    plan = ' | '.join(details)
+    if index_name is None:
+        if not any(detail.startswith('SEARCH') for detail in details):
+            return f"{label}: parcours complet sans index ({plan})"
+    elif not any(f"INDEX {index_name}" in detail for detail in details):
+        return f"{label}: index {index_name} non utilisé ({plan})"
+    elif any('TEMP B-TREE' in detail for detail in details):
+        return f"{label}: tri temporaire ({plan})"
+    return None
+
+
+def check_query_plans():
+    """Retourne la liste des problèmes détectés (vide si tout est indexé)."""
+    problems = (check_query_plan(*query) for query in HOT_QUERIES)
+    return [problem for problem in problems if problem is not None]
@@ -0,0 +1,702 @@
+"""Import en masse de questions: lecture en flux et insertions ensemblistes.
+
+Les questions arrivent une par une (tableau JSON ou NDJSON lus par
+morceaux), sont normalisées puis écrites par tranches: un INSERT
+multi-lignes pour les questions, un autre pour leurs choix, et un commit
+par tranche pour libérer régulièrement le verrou d'écriture SQLite.
+
+import_file() (`flask import-file`) lit des fichiers CSV, NDJSON ou JSON et
+confie l'analyse et la validation des lignes à un pool de processus.
+
+sync_questions() sert les imports de référence (seed, import_questions.py):
+les questions sont rapprochées par `external_id` et seules les différences
+sont écrites, ce qui préserve l'historique des réponses.
+"""
+import codecs
+import csv
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Quiz, Question, Choice, AppMeta
+from image_store import decode_inline, externalize
+
+
+# Octets lus par morceau dans le flux de la requête
+READ_CHUNK_BYTES = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class ImportFormatError(ValueError):
+    """Flux illisible: l'import ne peut pas continuer."""
+
+
+def parse_quiz_id(raw_value, default_value: int = 1) -> int:
+    """Convertit divers formats de quiz_id en entier.
+
+    Accepte: int, str numérique, alias ('bases'→1, 'roland'→2, 'avance'→3).
+    """
+    if raw_value is None:
+        return int(default_value)
+    if isinstance(raw_value, int):
+        return raw_value
+    try:
+        text = str(raw_value).strip().lower()
+        if text.isdigit():
+            return int(text)
+        alias = {
+            'bases': 1,
+            'roland': 2,
+            'avance': 3,
+            'advanced': 3,
+            'hard': 3,
+            'medium': 2,
+            'easy': 1,
+        }
+        return int(alias.get(text, default_value))
+    except Exception:
+        return int(default_value)
+
+
+def normalize_question_payload(raw: dict, position_fallback: int, fallback_quiz_id: int = 1, forced_quiz_id: int | None = None) -> dict:
+    """Normalise différents formats d'entrée en payload standard Question+Choices.
+
+    Accepte:
+    - { quiz_id, position, title, text, choices: [{text, is_correct}] }
+    - { quizId, position, question, choices: {A: str, B: str, ...}, correct: 'A' }
+    - { quiz_id?, question, possibleAnswers: [str], correctIndex|answerIndex: int }
+    """
+    # Déterminer le quiz cible
+    if forced_quiz_id is not None:
+        quiz_id = int(forced_quiz_id)
+    else:
+        provided = raw.get("quiz_id") or raw.get("quizId")
+        if provided is not None:
+            quiz_id = parse_quiz_id(provided, default_value=fallback_quiz_id)
+        else:
+            # Mapper automatiquement par difficulté si fournie
+            diff = str(raw.get("difficulty", "easy")).lower().strip()
+            diff_to_quiz = {"easy": 1, "medium": 2, "hard": 3}
+            quiz_id = diff_to_quiz.get(diff, fallback_quiz_id)
+    title = raw.get("title") or raw.get("question") or "Question"
+    text = raw.get("text") or raw.get("question") or ""
+    position = raw.get("position") or position_fallback
+
+    # Construire la liste choices
+    choices = []
+    if isinstance(raw.get("choices"), list):
+        # Déjà sous forme [{text, is_correct}]
+        choices = [
+            {"text": c.get("text", ""), "is_correct": bool(c.get("is_correct", False))}
+            for c in raw["choices"]
+        ]
+    elif isinstance(raw.get("choices"), dict):
+        correct_letter = (raw.get("correct") or raw.get("answer") or "").strip()
+        for letter in ["A", "B", "C", "D"]:
+            if letter in raw["choices"]:
+                choices.append({
+                    "text": raw["choices"][letter],
+                    "is_correct": letter == correct_letter,
+                })
+    elif isinstance(raw.get("possibleAnswers"), list):
+        idx = raw.get("correctIndex")
+        if idx is None:
+            idx = raw.get("answerIndex")
+        for i, text_choice in enumerate(raw["possibleAnswers"]):
+            choices.append({
+                "text": text_choice,
+                "is_correct": (i == idx),
+            })
+
+    return {
+        "quiz_id": int(quiz_id),
+        "position": int(position),
+        "title": str(title),
+        "text": str(text),
+        "image": raw.get("image"),
+        "choices": choices,
+        "tags": json.dumps(raw.get("tags", [])),
+        "difficulty": raw.get("difficulty", "easy"),
+        "explanation": raw.get("explanation"),
+        "external_id": raw.get("external_id"),
+    }
+
+
+def iter_json_array(stream, chunk_bytes=READ_CHUNK_BYTES):
+    """Parcourt les éléments d'un tableau JSON sans charger tout le flux."""
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer, pos, eof = '', 0, False
+    expecting = '['
+
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos >= len(buffer):
+            if eof:
+                raise ImportFormatError('Expected an array of questions' if expecting == '['
+                                        else 'Unexpected end of JSON array')
+            chunk = stream.read(chunk_bytes)
+            eof = not chunk
+            buffer = buffer[pos:] + text_decoder.decode(chunk, final=eof)
+            pos = 0
+            continue
+
+        char = buffer[pos]
+        if expecting == '[':
+            if char != '[':
+                raise ImportFormatError('Expected an array of questions')
+            pos += 1
+            expecting = 'item_or_end'
+        elif expecting in ('item_or_end', 'item'):
+            if char == ']' and expecting == 'item_or_end':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ImportFormatError(f'Invalid JSON: {e}') from e
+                # Élément coupé en fin de morceau: lire la suite
+                chunk = stream.read(chunk_bytes)
+                eof = not chunk
+                buffer = buffer[pos:] + text_decoder.decode(chunk, final=eof)
+                pos = 0
+                continue
+            pos = end
+            expecting = 'separator'
+            yield item
+        else:
+            if char == ']':
+                return
+            if char != ',':
+                raise ImportFormatError(f"Expected ',' or ']' in JSON array, got {char!r}")
+            pos += 1
+            expecting = 'item'
+
+
+def _iter_lines(stream, chunk_bytes):
+    # Lecture par morceaux: itérer le flux WSGI ligne à ligne lit octet par octet
+    pending = b''
+    while True:
+        chunk = stream.read(chunk_bytes)
+        if not chunk:
+            break
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def iter_ndjson(stream, chunk_bytes=READ_CHUNK_BYTES):
+    """Parcourt un flux NDJSON; une ligne invalide donne une ValueError à sa place."""
+    for raw_line in _iter_lines(stream, chunk_bytes):
+        if not raw_line.strip():
+            continue
+        try:
+            yield json.loads(raw_line)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            yield ValueError(f'Invalid JSON line: {e}')
+
+
+def insert_questions(rows):
+    """Insère des payloads normalisés (questions + choix) sans commit.
+
+    Exécution « executemany »: SQLAlchemy regroupe les lignes en INSERT
+    multi-lignes à partir d'une instruction compilée une seule fois. SQLite
+    ne garantit pas l'ordre de RETURNING d'un INSERT multi-lignes:
+    sort_by_parameter_order fait remettre les ids dans l'ordre de `rows`.
+    """
+    if not rows:
+        return []
+    now = datetime.utcnow()
+    conn = db.session.connection()
+    questions = Question.__table__
+    result = conn.execute(insert(questions).returning(questions.c.id, sort_by_parameter_order=True), [
+        {
+            'quiz_id': row['quiz_id'],
+            'position': row['position'],
+            'title': row['title'],
+            'text': row['text'],
+            'image': externalize(row.get('image')),
+            'difficulty': row['difficulty'],
+            'tags': row['tags'],
+            'explanation': row['explanation'],
+            'external_id': row.get('external_id'),
+            'source': row.get('source'),
+            'created_at': now,
+        }
+        for row in rows
+    ])
+    question_ids = result.scalars().all()
+
+    choice_rows = [
+        {
+            'question_id': question_id,
+            'text': choice['text'],
+            'is_correct': bool(choice.get('is_correct', False)),
+            'position': rank,
+            'created_at': now,
+        }
+        for row, question_id in zip(rows, question_ids)
+        for rank, choice in enumerate(row['choices'], start=1)
+    ]
+    if choice_rows:
+        conn.execute(insert(Choice.__table__), choice_rows)
+    return question_ids
+
+
+def _place(rows, next_position):
+    """Attribue leur position aux `rows`, dans l'ordre, sans commit.
+
+    `next_position` donne la première position libre de chaque quiz. Sans
+    position, ou au-delà de la fin, une ligne est ajoutée à la suite; une
+    position explicite décale les questions suivantes de +1, comme
+    POST /api/questions. Retourne (copies placées, positions libres suivantes).
+    """
+    positions = dict(next_position)
+    placed = []
+    for row in rows:
+        quiz_id = row['quiz_id']
+        end = positions[quiz_id]
+        position = end if row['position'] is None or row['position'] >= end else max(1, row['position'])
+        if position < end:
+            Question.shift_positions(quiz_id, position)
+            for other in placed:
+                if other['quiz_id'] == quiz_id and other['position'] >= position:
+                    other['position'] += 1
+        placed.append(dict(row, position=position))
+        positions[quiz_id] = end + 1
+    return placed, positions
+
+
+def write_chunk(numbered_rows, next_position=None):
+    """Écrit une tranche de (numéro, payload) et la commit.
+
+    En cas de conflit (position déjà prise...), la tranche est rejouée ligne
+    par ligne pour n'écarter que les lignes fautives. Avec `next_position`
+    (voir _place), les positions sont attribuées à l'écriture, aux seules
+    lignes insérées: un rejet ne laisse pas de trou. Retourne
+    (nombre inséré, erreurs [{row, error}]).
+    """
+    if not numbered_rows:
+        return 0, []
+    rows = [row for _, row in numbered_rows]
+    quiz_ids = {row['quiz_id'] for row in rows}
+    try:
+        if next_position is not None:
+            rows, positions = _place(rows, next_position)
+        insert_questions(rows)
+        Quiz.refresh_question_counts(quiz_ids)
+        db.session.commit()
+        if next_position is not None:
+            next_position.update(positions)
+        return len(rows), []
+    except IntegrityError:
+        db.session.rollback()
+
+    inserted, errors = 0, []
+    for number, row in numbered_rows:
+        try:
+            rows = [row]
+            if next_position is not None:
+                rows, positions = _place(rows, next_position)
+            insert_questions(rows)
+            db.session.commit()
+            if next_position is not None:
+                next_position.update(positions)
+            inserted += 1
+        except IntegrityError as e:
+            db.session.rollback()
+            errors.append({'row': number, 'error': str(e.orig)})
+    Quiz.refresh_question_counts(quiz_ids)
+    db.session.commit()
+    return inserted, errors
+
+
+def import_items(items, normalize, chunk_size, on_chunk=None):
+    """Normalise et écrit des éléments bruts par tranches de `chunk_size`.
+
+    `normalize(raw, number)` retourne un payload ou lève une exception,
+    reportée comme erreur de la ligne. Un élément déjà en erreur (exception
+    produite par le lecteur) est reporté tel quel. `on_chunk()` est appelé
+    après chaque commit. Retourne (nombre inséré, erreurs).
+    """
+    inserted, errors, pending = 0, [], []
+
+    def flush():
+        nonlocal inserted
+        count, chunk_errors = write_chunk(pending)
+        inserted += count
+        errors.extend(chunk_errors)
+        pending.clear()
+        if on_chunk is not None:
+            on_chunk()
+
+    for number, raw in enumerate(items, start=1):
+        if isinstance(raw, Exception):
+            errors.append({'row': number, 'error': str(raw)})
+            continue
+        try:
+            pending.append((number, normalize(raw, number)))
+        except Exception as e:  # noqa: BLE001
+            errors.append({'row': number, 'error': str(e)})
+            continue
+        if len(pending) >= chunk_size:
+            flush()
+    if pending:
+        flush()
+    return inserted, errors
+
+
+# Colonnes d'une question comparées et mises à jour par sync_questions()
+SYNC_FIELDS = ('position', 'title', 'text', 'image', 'difficulty', 'tags', 'explanation')
+
+
+def _label(row):
+    return row.get('external_id') or f"quiz {row['quiz_id']} #{row['position']}"
+
+
+def _in_chunks(column, values):
+    """Conditions IN découpées sous la limite de paramètres SQLite."""
+    values = list(values)
+    size = Choice.IN_CLAUSE_CHUNK
+    return [column.in_(values[start:start + size]) for start in range(0, len(values), size)]
+
+
+def _delete_questions(question_ids):
+    """Supprime des questions (ensembliste); choix et réponses suivent par ON DELETE CASCADE."""
+    for condition in _in_chunks(Question.id, question_ids):
+        Question.query.filter(condition).delete(synchronize_session=False)
+
+
+def _free_positions(rows, kept, matched):
+    """Nouvelles positions des questions conservées hors synchronisation.
+
+    Les questions de `rows` prennent les positions de leur fichier; les
+    autres questions `kept` (créées à la main, autre source) occupent, dans
+    leur ordre actuel, les positions que le fichier laisse libres.
+    Retourne {question: position} pour celles qui doivent bouger.
+    """
+    targets = {}
+    for row in rows:
+        targets.setdefault(row['quiz_id'], set()).add(row['position'])
+    moves = {}
+    slots = {}
+    others = sorted((q for q in kept if q.id not in matched), key=lambda q: (q.quiz_id, q.position))
+    for question in others:
+        taken = targets.get(question.quiz_id, set())
+        position = slots.get(question.quiz_id, 0) + 1
+        while position in taken:
+            position += 1
+        slots[question.quiz_id] = position
+        if position != question.position:
+            moves[question] = position
+    return moves
+
+
+def sync_questions(rows, quiz_ids, source, dry_run=False):
+    """Aligne les questions des quizzes `quiz_ids` sur `rows`, sans commit.
+
+    `rows` sont des payloads normalisés portant un `external_id`. Une question
+    existante est retrouvée par (quiz, external_id), ou à défaut par
+    (quiz, position) si elle n'a ni external_id ni source (première
+    synchronisation d'une base existante); elle passe alors sous `source`.
+    Seules les questions et choix modifiés sont réécrits; seules les
+    questions de `source` absentes de `rows` sont supprimées: celles créées à
+    la main ou importées par ailleurs (import-file...) sont conservées et
+    décalées sur les positions laissées libres (voir _free_positions). Les
+    choix sont repris par leur texte (voir Choice.match), jamais par rang:
+    un choix n'est pas réécrit sous l'id d'un autre, et un choix disparu du
+    fichier est supprimé avec ses réponses, comme une question disparue.
+
+    Retourne le rapport {created, updated, deleted, unchanged}; avec `dry_run`
+    rien n'est écrit.
+    """
+    # Les images en ligne sont comparées (et stockées) sous forme de référence
+    rows = [dict(row, image=externalize(row['image'], save=not dry_run)) if decode_inline(row.get('image'))
+            else row for row in rows]
+    rows = [dict(row, source=source) for row in rows]
+    scope = set(quiz_ids) | {row['quiz_id'] for row in rows}
+    existing = {q.id: q for q in Question.query.filter(Question.quiz_id.in_(scope)).all()}
+    by_external_id = {(q.quiz_id, q.external_id): q for q in existing.values() if q.external_id}
+    by_position = {(q.quiz_id, q.position): q for q in existing.values()
+                   if q.external_id is None and q.source is None}
+    choices_by_question = Choice.load_for_questions(list(existing))
+
+    report = {'created': [], 'updated': [], 'deleted': [], 'unchanged': 0}
+    creates, updates, matched = [], [], set()
+    for row in rows:
+        question = by_external_id.get((row['quiz_id'], row.get('external_id')))
+        if question is None:
+            question = by_position.get((row['quiz_id'], row['position']))
+        if question is None or question.id in matched:
+            creates.append(row)
+            report['created'].append(_label(row))
+            continue
+        matched.add(question.id)
+
+        fields = {name: row.get(name) for name in SYNC_FIELDS if getattr(question, name) != row.get(name)}
+        for name in ('external_id', 'source'):
+            if getattr(question, name) != row.get(name):
+                fields[name] = row.get(name)
+        current = [(c.text, bool(c.is_correct)) for c in choices_by_question.get(question.id, [])]
+        wanted = [{'text': c['text'], 'is_correct': bool(c.get('is_correct', False))} for c in row['choices']]
+        choices_changed = current != [(c['text'], c['is_correct']) for c in wanted]
+        if not fields and not choices_changed:
+            report['unchanged'] += 1
+            continue
+        updates.append((question, fields, wanted))
+        report['updated'].append({
+            'question': _label(row),
+            'fields': sorted(fields) + (['choices'] if choices_changed else []),
+        })
+
+    removed = [q for q in existing.values()
+               if q.quiz_id in scope and q.id not in matched and q.source == source]
+    report['deleted'] = sorted(q.external_id or f'quiz {q.quiz_id} #{q.position}' for q in removed)
+    removed_ids = {q.id for q in removed}
+    kept = [q for q in existing.values() if q.id not in removed_ids]
+    shifted = _free_positions(rows, kept, matched)
+    report['updated'].extend(
+        {'question': question.external_id or f'quiz {question.quiz_id} #{question.position}', 'fields': ['position']}
+        for question in sorted(shifted, key=lambda q: (q.quiz_id, q.position))
+    )
+    if dry_run:
+        return report
+
+    _delete_questions([q.id for q in removed])
+
+    # Questions déplacées: d'abord sur une position temporaire libre (-id)
+    # pour ne pas heurter la contrainte (quiz_id, position) pendant l'échange
+    moved = [question for question, fields, _ in updates if 'position' in fields] + list(shifted)
+    for question in moved:
+        question.position = -question.id
+    db.session.flush()
+    for question, position in shifted.items():
+        question.position = position
+
+    now = datetime.utcnow()
+    new_choices, dropped = [], []
+    for question, fields, wanted in updates:
+        for name, value in fields.items():
+            setattr(question, name, value)
+        current = choices_by_question.get(question.id, [])
+        matches = Choice.match(current, wanted)
+        for rank, (choice, item) in enumerate(zip(matches, wanted), start=1):
+            if choice is None:
+                new_choices.append({'question_id': question.id, 'text': item['text'],
+                                    'is_correct': item['is_correct'], 'position': rank, 'created_at': now})
+            elif (bool(choice.is_correct), choice.position) != (item['is_correct'], rank):
+                choice.is_correct, choice.position = item['is_correct'], rank
+        kept_choices = {choice.id for choice in matches if choice is not None}
+        dropped.extend(choice.id for choice in current if choice.id not in kept_choices)
+    for condition in _in_chunks(Choice.id, dropped):
+        Choice.query.filter(condition).delete(synchronize_session=False)
+    db.session.flush()
+    if new_choices:
+        db.session.connection().execute(insert(Choice.__table__), new_choices)
+
+    insert_questions(creates)
+    if creates or removed:
+        Quiz.refresh_question_counts(scope)
+    return report
+
+
+# Lignes envoyées à un processus d'analyse par tâche
+PARSE_BATCH_ROWS = 2000
+
+CSV_CHOICE_LETTERS = ('A', 'B', 'C', 'D')
+
+
+def csv_record_to_item(record):
+    """Ligne CSV (colonne -> valeur) au format de data/questions.json.
+
+    Colonnes: id, quizId, question, choiceA..D, correct, explanation,
+    difficulty, tags (liste séparée par '|'), position et image optionnelles.
+    """
+    tags = [tag.strip() for tag in re.split(r'[|,]', record.get('tags') or '') if tag.strip()]
+    item = {
+        'external_id': (record.get('id') or '').strip() or None,
+        'quizId': (record.get('quizId') or record.get('quiz_id') or '').strip() or None,
+        'question': (record.get('question') or '').strip(),
+        'choices': {
+            letter: record[f'choice{letter}'].strip()
+            for letter in CSV_CHOICE_LETTERS if (record.get(f'choice{letter}') or '').strip()
+        },
+        'correct': (record.get('correct') or '').strip().upper(),
+        'explanation': (record.get('explanation') or '').strip() or None,
+        'image': (record.get('image') or '').strip() or None,
+        'difficulty': (record.get('difficulty') or 'easy').strip().lower(),
+        'tags': tags,
+    }
+    if (record.get('position') or '').strip():
+        item['position'] = int(record['position'])
+    return item
+
+
+def _validate(row):
+    if not row['text'].strip():
+        raise ValueError('Missing question text')
+    if len(row['choices']) < 2:
+        raise ValueError('At least two choices are required')
+    if not any(choice['is_correct'] for choice in row['choices']):
+        raise ValueError('No correct choice')
+
+
+def parse_batch(task):
+    """Analyse et valide une tranche de lignes (exécuté dans un processus du pool).
+
+    `task` = (format, en-tête CSV, [(ligne, donnée brute)], quiz forcé).
+    Retourne ([(ligne, payload normalisé)], erreurs [{row, error}]); la
+    position vaut None quand le fichier n'en fournit pas.
+    """
+    kind, header, lines, forced_quiz_id = task
+    rows, errors = [], []
+    for line, data in lines:
+        try:
+            if kind == 'csv':
+                if len(data) != len(header):
+                    raise ValueError(f'Expected {len(header)} columns, got {len(data)} (unquoted comma?)')
+                raw = csv_record_to_item(dict(zip(header, data)))
+            elif kind == 'ndjson':
+                raw = json.loads(data)
+            else:
+                raw = data
+            if kind != 'csv' and isinstance(raw, dict) and isinstance(raw.get('id'), str):
+                # Format de data/questions.json: l'id texte est l'identifiant stable
+                raw.setdefault('external_id', raw['id'])
+            row = normalize_question_payload(raw, position_fallback=0, forced_quiz_id=forced_quiz_id)
+            if not raw.get('position'):
+                row['position'] = None
+            _validate(row)
+            rows.append((line, row))
+        except Exception as e:  # noqa: BLE001
+            errors.append({'row': line, 'error': str(e)})
+    return rows, errors
+
+
+def _is_csv_header(cells):
+    names = [cell.strip() for cell in cells]
+    return bool(names) and names[0] == 'id' and 'question' in names
+
+
+def iter_file_tasks(path, forced_quiz_id=None, batch_rows=PARSE_BATCH_ROWS):
+    """Découpe un fichier CSV, NDJSON (.ndjson, .jsonl) ou JSON en tâches pour parse_batch.
+
+    Le fichier est lu en flux. En CSV, une ligne d'en-tête rencontrée en cours
+    de fichier (exports concaténés) remplace l'en-tête courant.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            header, batch = None, []
+            for cells in reader:
+                if not any(cell.strip() for cell in cells):
+                    continue
+                if header is None or _is_csv_header(cells):
+                    if batch:
+                        yield ('csv', header, batch, forced_quiz_id)
+                        batch = []
+                    header = [cell.strip() for cell in cells]
+                    continue
+                batch.append((reader.line_num, cells))
+                if len(batch) >= batch_rows:
+                    yield ('csv', header, batch, forced_quiz_id)
+                    batch = []
+            if batch:
+                yield ('csv', header, batch, forced_quiz_id)
+        return
+
+    if extension in ('.ndjson', '.jsonl'):
+        kind = 'ndjson'
+        f = open(path, 'rb')
+        numbered = ((number, line) for number, line in enumerate(f, start=1) if line.strip())
+    else:
+        kind = 'json'
+        f = open(path, 'rb')
+        numbered = enumerate(iter_json_array(f), start=1)
+    with f:
+        batch = []
+        for number, data in numbered:
+            batch.append((number, data))
+            if len(batch) >= batch_rows:
+                yield (kind, None, batch, forced_quiz_id)
+                batch = []
+        if batch:
+            yield (kind, None, batch, forced_quiz_id)
+
+
+def _parsed_batches(tasks, workers):
+    """Résultats de parse_batch dans l'ordre du fichier, au plus 2 tâches par
+    processus en vol pour borner la mémoire."""
+    if workers <= 1:
+        yield from map(parse_batch, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for task in tasks:
+            in_flight.append(pool.submit(parse_batch, task))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def import_file(path, workers=None, chunk_size=1000, forced_quiz_id=None, on_progress=None):
+    """Importe un fichier de questions (ajout): analyse parallèle, écritures par tranches.
+
+    Les questions sans position sont ajoutées à la suite de leur quiz; une
+    position explicite décale les suivantes (voir _place). Les lignes
+    invalides ou visant un quiz inexistant sont reportées dans `errors`.
+    `on_progress(stats)` est appelé après chaque commit.
+    Retourne les statistiques {read, inserted, errors, seconds}.
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    stats = {'read': 0, 'inserted': 0, 'errors': [], 'seconds': 0.0}
+    known_quizzes = {quiz_id for (quiz_id,) in db.session.query(Quiz.id)}
+    next_position = {}
+    pending = []
+
+    def flush():
+        inserted, errors = write_chunk(pending, next_position)
+        if inserted:
+            # Pour les caches de l'API en cours d'exécution (autre processus)
+            AppMeta.bump_content_version()
+            db.session.commit()
+        stats['inserted'] += inserted
+        stats['errors'].extend(errors)
+        pending.clear()
+        stats['seconds'] = time.perf_counter() - started
+        if on_progress is not None:
+            on_progress(stats)
+
+    tasks = iter_file_tasks(path, forced_quiz_id)
+    for rows, errors in _parsed_batches(tasks, workers):
+        stats['read'] += len(rows) + len(errors)
+        stats['errors'].extend(errors)
+        for line, row in rows:
+            quiz_id = row['quiz_id']
+            if quiz_id not in known_quizzes:
+                stats['errors'].append({'row': line, 'error': f'Quiz {quiz_id} not found'})
+                continue
+            if quiz_id not in next_position:
+                last = db.session.query(func.max(Question.position)).filter_by(quiz_id=quiz_id).scalar()
+                next_position[quiz_id] = (last or 0) + 1
+            pending.append((line, row))
+            if len(pending) >= chunk_size:
+                flush()
+    if pending:
+        flush()
+    stats['errors'].sort(key=lambda error: error['row'])
+    stats['seconds'] = time.perf_counter() - started
+    return stats
@@ -1,5 +1,7 @@
 from typing import Dict, Any
 
+from image_store import externalize
+
 
 # ---------------------------------------------------------------------------
 # Service layer – CRUD Question
@@ -26,7 +28,7 @@ def create_question(data: Dict[str, Any], *, db, Question):  # type: ignore[N803
         position=data['position'],
         title=data['title'],
         text=data['text'],
-        image_b64=data.get('image_b64'),
+        image_b64=externalize(data.get('image_b64')),
     )
     db.session.add(q)
     db.session.commit()
@@ -41,9 +43,12 @@ def update_question(question, data: Dict[str, Any], *, db, Question):  # type: i
             raise ValueError('Une question existe déjà pour cette position')
         question.position = data['position']
 
-    for field in ('title', 'text', 'image_b64'):
+    for field in ('title', 'text'):
         if field in data:
             setattr(question, field, data[field])
+    if 'image_b64' in data:
+        # Le nom de champ est historique: seule la référence est stockée
+        question.image_b64 = externalize(data['image_b64'])
 
     db.session.commit()
     return question
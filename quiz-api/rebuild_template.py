@@ -0,0 +1,115 @@
+"""Reconstruction rapide de la base depuis un gabarit SQLite.
+
+Le rebuild (drop_all + create_all + quizzes par défaut) est rejoué des
+centaines de fois par jour par les pipelines de test. La base vierge est
+donc construite une seule fois dans un fichier gabarit, puis recopiée sur la
+base courante avec l'API de sauvegarde de SQLite (quelques millisecondes).
+
+Le nom du gabarit contient la version du schéma et une empreinte du DDL,
+des quizzes par défaut et de la taille de page: toute évolution du schéma
+ou des données d'amorçage produit un nouveau gabarit, jamais une base
+périmée. Hors SQLite, le rebuild classique est conservé.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+from flask import current_app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from models import db, Quiz, AppMeta
+from migrations import MIGRATIONS, SCHEMA_VERSION_KEY
+from seed import DEFAULT_QUIZZES, ensure_default_quizzes
+
+
+# Contenu de chaque gabarit: schéma seul (/api/rebuild-db) ou avec les quizzes par défaut
+KINDS = {'empty': False, 'default_quizzes': True}
+
+_build_lock = threading.Lock()
+
+
+def _schema_version():
+    return MIGRATIONS[-1][0]
+
+
+def _page_size(connection):
+    return connection.exec_driver_sql('PRAGMA page_size').scalar()
+
+
+def _fingerprint(kind, dialect, page_size):
+    """Empreinte du contenu du gabarit (DDL, données d'amorçage, taille de page)."""
+    digest = hashlib.sha256()
+    for table in db.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    if KINDS[kind]:
+        digest.update(json.dumps(DEFAULT_QUIZZES, sort_keys=True).encode())
+    digest.update(str(page_size).encode())
+    return digest.hexdigest()[:16]
+
+
+def template_path(kind, dialect, page_size):
+    directory = current_app.config['REBUILD_TEMPLATE_DIR']
+    return os.path.join(directory, f'{kind}-v{_schema_version()}-{_fingerprint(kind, dialect, page_size)}.db')
+
+
+def _build_template(path, kind, page_size):
+    """Construit le gabarit dans un fichier temporaire puis le publie (os.replace)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    engine = create_engine(f'sqlite:///{tmp_path}')
+    try:
+        with engine.begin() as connection:
+            # La sauvegarde vers une base en WAL exige la même taille de page
+            connection.exec_driver_sql(f'PRAGMA page_size = {int(page_size)}')
+        db.metadata.create_all(engine)
+        with Session(engine) as session:
+            if KINDS[kind]:
+                session.add_all(Quiz(**data) for data in DEFAULT_QUIZZES)
+            # Base neuve au dernier schéma: aucune migration à rejouer au démarrage
+            session.add(AppMeta(key=SCHEMA_VERSION_KEY, value=str(_schema_version())))
+            session.commit()
+    except Exception:
+        engine.dispose()
+        os.remove(tmp_path)
+        raise
+    engine.dispose()
+    os.replace(tmp_path, path)
+
+
+def _restore(path):
+    """Remplace tout le contenu de la base courante par celui du gabarit."""
+    db.session.remove()
+    raw = db.engine.raw_connection()
+    try:
+        source = sqlite3.connect(path)
+        try:
+            source.backup(raw.driver_connection)
+        finally:
+            source.close()
+    finally:
+        raw.close()
+
+
+def rebuild(kind):
+    """Remet la base à l'état vierge `kind` (voir KINDS), commit inclus."""
+    if db.engine.dialect.name != 'sqlite':
+        db.drop_all()
+        db.create_all()
+        if KINDS[kind]:
+            ensure_default_quizzes()
+        db.session.commit()
+        return
+    with db.engine.connect() as connection:
+        page_size = _page_size(connection)
+    path = template_path(kind, db.engine.dialect, page_size)
+    with _build_lock:
+        if not os.path.exists(path):
+            _build_template(path, kind, page_size)
+    _restore(path)
@@ -0,0 +1,118 @@
+"""Classements par fenêtre de temps (jour, semaine ISO, mois, toujours).
+
+Chaque tentative met à jour, dans la même transaction, la meilleure
+tentative du joueur pour la période courante de chaque fenêtre
+(table leaderboard_rollups). Une période passée ne reçoit plus aucune
+tentative: son classement est figé et peut être mis en cache sans limite.
+"""
+import re
+from datetime import datetime
+
+from sqlalchemy import and_, case, desc, or_
+from sqlalchemy.dialects.sqlite import insert
+
+from models import db, Attempt, LeaderboardRollup
+
+
+WINDOWS = ('day', 'week', 'month', 'all')
+
+# Format attendu du paramètre `bucket` pour chaque fenêtre
+BUCKET_PATTERNS = {
+    'day': re.compile(r'^\d{4}-\d{2}-\d{2}$'),
+    'week': re.compile(r'^\d{4}-W\d{2}$'),
+    'month': re.compile(r'^\d{4}-\d{2}$'),
+    'all': re.compile(r'^all$'),
+}
+
+# 10 colonnes par ligne: reste sous la limite de 999 paramètres SQLite
+ROWS_PER_UPSERT = 90
+
+
+def bucket_for(window, moment):
+    """Identifiant de la période de `window` contenant `moment`."""
+    if window == 'day':
+        return moment.strftime('%Y-%m-%d')
+    if window == 'week':
+        year, week, _ = moment.isocalendar()
+        return f'{year}-W{week:02d}'
+    if window == 'month':
+        return moment.strftime('%Y-%m')
+    return 'all'
+
+
+def is_closed(window, bucket, now=None):
+    """Vrai si la période est terminée (elle ne changera plus)."""
+    if window == 'all':
+        return False
+    return bucket < bucket_for(window, now or datetime.utcnow())
+
+
+def record(attempts):
+    """Reporte des tentatives dans les classements par fenêtre (sans commit).
+
+    `attempts` est une liste de (attempt_id, quiz_id, player_name, score,
+    total_questions, time_spent, created_at).
+    """
+    rows = [
+        {
+            'window': window,
+            'bucket': bucket_for(window, created_at),
+            'quiz_id': quiz_id,
+            'player_name': player_name,
+            'attempt_id': attempt_id,
+            'score': score or 0,
+            'total_questions': total_questions,
+            'time_spent': time_spent or 0,
+            'created_at': created_at,
+            'attempts_count': 1,
+        }
+        for attempt_id, quiz_id, player_name, score, total_questions, time_spent, created_at in attempts
+        for window in WINDOWS
+    ]
+    for start in range(0, len(rows), ROWS_PER_UPSERT):
+        db.session.execute(_upsert(rows[start:start + ROWS_PER_UPSERT]))
+
+
+def _upsert(rows):
+    stmt = insert(LeaderboardRollup).values(rows)
+    new, current = stmt.excluded, LeaderboardRollup
+    # Meilleur score, puis plus rapide; à égalité la tentative la plus ancienne reste
+    better = or_(
+        new.score > current.score,
+        and_(new.score == current.score, new.time_spent < current.time_spent),
+    )
+    columns = ('attempt_id', 'score', 'total_questions', 'time_spent', 'created_at')
+    updates = {name: case((better, new[name]), else_=current.__table__.c[name]) for name in columns}
+    updates['attempts_count'] = current.attempts_count + 1
+    return stmt.on_conflict_do_update(
+        index_elements=['window', 'bucket', 'quiz_id', 'player_name'],
+        set_=updates,
+    )
+
+
+def backfill(batch_size=1000):
+    """Reconstruit les classements par fenêtre depuis `attempts` (migration)."""
+    LeaderboardRollup.query.delete()
+    rows = (db.session.query(Attempt.id, Attempt.quiz_id, Attempt.player_name, Attempt.score,
+                             Attempt.total_questions, Attempt.time_spent, Attempt.created_at)
+            .filter(Attempt.created_at.isnot(None))
+            .order_by(Attempt.id)
+            .yield_per(batch_size))
+    batch = []
+    for row in rows:
+        batch.append(tuple(row))
+        if len(batch) >= batch_size:
+            record(batch)
+            batch = []
+    record(batch)
+
+
+def top(quiz_id, window, bucket, limit=50):
+    """Classement (meilleure tentative par joueur) d'une période, en dicts."""
+    rollups = (LeaderboardRollup.query
+               .filter_by(window=window, bucket=bucket, quiz_id=quiz_id)
+               .order_by(desc(LeaderboardRollup.score), LeaderboardRollup.time_spent.asc(),
+                         LeaderboardRollup.created_at.asc())
+               .limit(limit)
+               .all())
+    return [rollup.to_dict() for rollup in rollups]
@@ -1,6 +1,11 @@
 """Routes pour les tentatives de quiz."""
-from flask import Blueprint, request, jsonify
-from models import db, Attempt, Answer, Question, Choice, Quiz
+from datetime import datetime
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy import and_, func, or_
+from models import db, Attempt, Quiz
+from pagination import encode_cursor, decode_cursor
+from answer_keys import answer_keys
+from attempt_writer import save_attempt, AttemptWriteTimeout
 
 attempt_bp = Blueprint('attempt', __name__)
 
@@ -25,59 +30,43 @@ def submit_attempt():
         if not quiz:
             return jsonify({'error': 'Quiz not found'}), 404
         
-        # Créer la tentative
-        total_questions = quiz.questions.count()
-        attempt = Attempt(
-            quiz_id=quiz_id,
-            player_name=player_name,
-            total_questions=total_questions,
-            time_spent=time_spent,
-            score=0  # Sera calculé après
-        )
-        db.session.add(attempt)
-        db.session.flush()  # Pour obtenir l'ID
-        
-        # Traiter chaque réponse
+        # Noter la tentative (corrigé compilé: aucune requête par réponse)
+        total_questions = quiz.question_count
+        answer_key = answer_keys.get(quiz_id)
         correct_count = 0
         correct_answers = []
+        graded = []
         
         for answer_data in answers_data:
             question_id = answer_data['question_id']
             choice_id = answer_data['choice_id']
             
             # Vérifier si la réponse est correcte
-            choice = Choice.query.get(choice_id)
-            if not choice or choice.question_id != question_id:
+            is_correct = answer_key.grade(question_id, choice_id)
+            if is_correct is None:
                 continue
             
-            is_correct = choice.is_correct
             if is_correct:
                 correct_count += 1
                 correct_answers.append(question_id)
-            
-            # Enregistrer la réponse
-            answer = Answer(
-                attempt_id=attempt.id,
-                question_id=question_id,
-                choice_id=choice_id,
-                is_correct=is_correct
-            )
-            db.session.add(answer)
+            graded.append((question_id, choice_id, is_correct))
         
-        # Mettre à jour le score
-        attempt.score = correct_count
-        db.session.commit()
+        # Enregistrer la tentative et ses réponses
+        attempt_id = save_attempt(quiz_id, player_name, total_questions, correct_count, time_spent, graded)
         
         # Retourner le résultat
         return jsonify({
-            'id': attempt.id,
-            'score': attempt.score,
-            'total_questions': attempt.total_questions,
-            'percentage': round((attempt.score / attempt.total_questions * 100), 2) if attempt.total_questions > 0 else 0,
-            'time_spent': attempt.time_spent,
+            'id': attempt_id,
+            'score': correct_count,
+            'total_questions': total_questions,
+            'percentage': round((correct_count / total_questions * 100), 2) if total_questions > 0 else 0,
+            'time_spent': time_spent,
             'correct_answers': correct_answers
         }), 201
         
+    except AttemptWriteTimeout as e:
+        # Accepté mais pas encore confirmé: un nouvel envoi ferait un doublon
+        return jsonify({'message': str(e)}), 202
     except KeyError as e:
         db.session.rollback()
         return jsonify({'error': f'Missing field: {str(e)}'}), 400
@@ -93,9 +82,75 @@ def get_attempt(attempt_id):
     return jsonify(attempt.to_dict(include_answers=True)), 200
 
 
+@attempt_bp.route('/<int:attempt_id>/review', methods=['GET'])
+def review_attempt(attempt_id):
+    """Correction d'une tentative: réponses données, questions et choix (3 requêtes)."""
+    attempt = Attempt.query.get_or_404(attempt_id)
+    return jsonify(attempt.review_dict()), 200
+
+
 @attempt_bp.route('/player/<player_name>', methods=['GET'])
 def get_player_attempts(player_name):
-    """Récupérer toutes les tentatives d'un joueur."""
-    attempts = Attempt.query.filter_by(player_name=player_name).order_by(Attempt.created_at.desc()).all()
-    return jsonify([attempt.to_dict() for attempt in attempts]), 200
+    """Récupérer les tentatives d'un joueur, des plus récentes aux plus anciennes.
+    
+    Paramètres: `limit`, `cursor` (en-tête X-Next-Cursor de la page
+    précédente), `quiz_id` pour filtrer, `summary=true` pour un résumé par quiz.
+    Sans `limit`, tout l'historique est renvoyé: les clients existants
+    attendent la liste complète.
+    """
+    quiz_id = request.args.get('quiz_id', type=int)
+    if request.args.get('summary', '').lower() in ('1', 'true'):
+        return jsonify(_player_summary(player_name, quiz_id)), 200
+    
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = max(0, min(limit, current_app.config['MAX_PAGE_SIZE']))
+    cursor = request.args.get('cursor')
+    
+    query = Attempt.query.filter(Attempt.player_name == player_name)
+    if quiz_id is not None:
+        query = query.filter(Attempt.quiz_id == quiz_id)
+    if cursor:
+        try:
+            created_at, attempt_id = decode_cursor(cursor, datetime, int)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        query = query.filter(or_(
+            Attempt.created_at < created_at,
+            and_(Attempt.created_at == created_at, Attempt.id < attempt_id),
+        ))
+    query = query.order_by(Attempt.created_at.desc(), Attempt.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    attempts = query.all()
+    
+    response = jsonify([attempt.to_dict() for attempt in attempts])
+    if limit and len(attempts) == limit:
+        response.headers['X-Next-Cursor'] = encode_cursor(attempts[-1].created_at, attempts[-1].id)
+    return response, 200
+
 
+def _player_summary(player_name, quiz_id=None):
+    """Nombre de tentatives, meilleur score et moyenne par quiz (une requête)."""
+    query = (db.session.query(Attempt.quiz_id,
+                              func.count(Attempt.id),
+                              func.max(Attempt.score),
+                              func.avg(Attempt.score),
+                              func.max(Attempt.created_at))
+             .filter(Attempt.player_name == player_name))
+    if quiz_id is not None:
+        query = query.filter(Attempt.quiz_id == quiz_id)
+    rows = query.group_by(Attempt.quiz_id).order_by(Attempt.quiz_id).all()
+    
+    quizzes = [{
+        'quiz_id': row_quiz_id,
+        'attempts': count,
+        'best_score': best_score,
+        'average_score': round(average_score or 0, 2),
+        'last_played_at': last_played.isoformat() if last_played else None,
+    } for row_quiz_id, count, best_score, average_score, last_played in rows]
+    return {
+        'player_name': player_name,
+        'total_attempts': sum(q['attempts'] for q in quizzes),
+        'quizzes': quizzes,
+    }
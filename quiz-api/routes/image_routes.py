@@ -0,0 +1,50 @@
+"""Routes des images de questions (stockage adressé par contenu, voir image_store)."""
+import os
+
+from flask import Blueprint, request, jsonify, send_file
+
+import image_store
+from middleware import require_auth
+
+
+image_bp = Blueprint('image', __name__)
+
+# Une référence désigne toujours le même contenu
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+@image_bp.route('', methods=['POST'])
+@require_auth
+def upload_image():
+    """Enregistre une image (multipart `file`, ou corps brut avec son Content-Type).
+
+    Retourne {"url": "/api/images/<sha256>.<ext>"}, à placer dans `image`.
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        data, mimetype = upload.read(), upload.mimetype
+    else:
+        data, mimetype = request.get_data(), request.mimetype
+    if mimetype not in image_store.EXTENSIONS:
+        return jsonify({'error': f"Unsupported image type: {mimetype or 'none'}"}), 415
+    if not data:
+        return jsonify({'error': 'Empty image'}), 400
+    return jsonify({'url': image_store.store(data, mimetype)}), 201
+
+
+@image_bp.route('/<name>', methods=['GET'])
+def get_image(name):
+    """Sert une image en flux, avec requêtes partielles (Range) et ETag = empreinte."""
+    match = image_store.NAME_PATTERN.match(name)
+    if not match or match.group(2) not in image_store.MIMETYPES:
+        return jsonify({'error': 'Image not found'}), 404
+    path = image_store.path_for(name)
+    if not os.path.exists(path):
+        return jsonify({'error': 'Image not found'}), 404
+    response = send_file(path, mimetype=image_store.MIMETYPES[match.group(2)],
+                         conditional=True, etag=match.group(1))
+    response.headers['Cache-Control'] = IMMUTABLE
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    # Un SVG ouvert directement ne doit exécuter aucun script
+    response.headers['Content-Security-Policy'] = "default-src 'none'; style-src 'unsafe-inline'; sandbox"
+    return response
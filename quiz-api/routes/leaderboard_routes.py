@@ -1,39 +1,124 @@
 """Routes pour le leaderboard."""
+from datetime import datetime
 from flask import Blueprint, request, jsonify
-from models import Attempt
-from sqlalchemy import desc
+from models import db, Attempt
+from sqlalchemy import desc, or_, tuple_
+from leaderboard import leaderboards, rank_entry, entry_to_dict, encode_cursor, decode_cursor
+from cache import cached_json_response
+import rollups
 
 leaderboard_bp = Blueprint('leaderboard', __name__)
 
+# Période terminée: plus de nouvelles tentatives, mais une purge (cleanup,
+# suppression d'un quiz) peut encore la modifier. Durée bornée, puis
+# revalidation par ETag (304 tant que rien n'a changé).
+CLOSED_WINDOW_CACHE_CONTROL = 'public, max-age=300'
+
 
 @leaderboard_bp.route('/<int:quiz_id>', methods=['GET'])
 def get_leaderboard(quiz_id):
-    """Récupère le classement d'un quiz."""
-    # Paramètres de pagination
+    """Récupère le classement d'un quiz.
+    
+    Pagination par curseur: passer `cursor` (en-tête X-Next-Cursor de la page
+    précédente) pour obtenir la page suivante. Avec `window=day|week|month|all`
+    (et `bucket` optionnel, période courante par défaut), retourne la
+    meilleure tentative de chaque joueur sur la période.
+    """
+    if 'window' in request.args:
+        return _window_leaderboard(quiz_id)
+    return _leaderboard_page(quiz_id)
+
+
+def _window_leaderboard(quiz_id):
+    """Classement d'une période, lu dans leaderboard_rollups."""
+    window = request.args.get('window')
+    if window not in rollups.WINDOWS:
+        return jsonify({'error': f"window must be one of: {', '.join(rollups.WINDOWS)}"}), 400
+    bucket = request.args.get('bucket') or rollups.bucket_for(window, datetime.utcnow())
+    if not rollups.BUCKET_PATTERNS[window].match(bucket):
+        return jsonify({'error': 'Invalid bucket'}), 400
     limit = request.args.get('limit', default=50, type=int)
-    limit = min(limit, 100)  # Max 100 entrées
+    limit = max(0, min(limit, 100))
     
-    # Récupérer les meilleures tentatives
-    # Trié par score DESC, puis temps ASC (le plus rapide gagne en cas d'égalité)
-    attempts = (Attempt.query
-                .filter_by(quiz_id=quiz_id)
-                .order_by(desc(Attempt.score), Attempt.time_spent.asc(), Attempt.created_at.asc())
-                .limit(limit)
-                .all())
+    # Période en cours: le classement évolue encore
+    if not rollups.is_closed(window, bucket):
+        return jsonify(rollups.top(quiz_id, window, bucket, limit)), 200
+    
+    # Période terminée: mise en cache côté client, pour une durée bornée
+    return cached_json_response(
+        ('leaderboard_window', quiz_id, window, bucket, limit),
+        lambda: (rollups.top(quiz_id, window, bucket, limit), quiz_id),
+        cache_control=CLOSED_WINDOW_CACHE_CONTROL,
+    )
+
+
+@leaderboard_bp.route('/<int:quiz_id>/players', methods=['GET'])
+def get_player_leaderboard(quiz_id):
+    """Classement d'un quiz limité à la meilleure tentative de chaque joueur."""
+    limit = request.args.get('limit', default=50, type=int)
+    limit = min(limit, 100)
     
-    return jsonify([attempt.to_dict() for attempt in attempts]), 200
+    return jsonify(leaderboards.top_players(quiz_id, limit)), 200
+
+
+@leaderboard_bp.route('/<int:quiz_id>/rank/<player_name>', methods=['GET'])
+def get_player_rank(quiz_id, player_name):
+    """Rang d'un joueur sur un quiz et les joueurs classés autour de lui."""
+    around = request.args.get('around', default=5, type=int)
+    around = max(0, min(around, 50))
+    
+    result = leaderboards.player_rank(quiz_id, player_name, around)
+    if result is None:
+        return jsonify({'error': 'No attempt found for this player'}), 404
+    
+    return jsonify(result), 200
 
 
 @leaderboard_bp.route('', methods=['GET'])
 def get_global_leaderboard():
-    """Récupère le classement global (tous les quizzes)."""
+    """Récupère le classement global (tous les quizzes), paginé comme get_leaderboard."""
+    return _leaderboard_page(None)
+
+
+def _leaderboard_page(quiz_id):
+    """Une page du classement, trié par score DESC, temps ASC, date ASC, id."""
+    # Paramètres de pagination
     limit = request.args.get('limit', default=50, type=int)
-    limit = min(limit, 100)
+    limit = max(0, min(limit, 100))  # Max 100 entrées par page
+    cursor = request.args.get('cursor')
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    attempts = (Attempt.query
-                .order_by(desc(Attempt.score), Attempt.time_spent.asc(), Attempt.created_at.asc())
-                .limit(limit)
-                .all())
+    # Servi depuis le classement en mémoire s'il est actif
+    if leaderboards.enabled():
+        entries = leaderboards.page(quiz_id, limit, after)
+    else:
+        entries = _sql_page(quiz_id, limit, after)
     
-    return jsonify([attempt.to_dict() for attempt in attempts]), 200
+    response = jsonify([entry_to_dict(entry) for entry in entries])
+    if limit and len(entries) == limit:
+        response.headers['X-Next-Cursor'] = encode_cursor(entries[-1])
+    return response, 200
+
 
+def _sql_page(quiz_id, limit, after):
+    """Page lue en base par keyset: le coût ne dépend pas de la profondeur."""
+    query = db.session.query(Attempt.id, Attempt.quiz_id, Attempt.player_name, Attempt.score,
+                             Attempt.total_questions, Attempt.time_spent, Attempt.created_at)
+    if quiz_id is not None:
+        query = query.filter(Attempt.quiz_id == quiz_id)
+    if after is not None:
+        score, time_spent, created_at, attempt_id = -after[0], after[1], after[2], after[3]
+        # Borne sur la colonne de tête (recherche par intervalle dans l'index),
+        # puis comparaison de ligne sur les colonnes croissantes pour les ex æquo
+        query = query.filter(Attempt.score <= score, or_(
+            Attempt.score < score,
+            tuple_(Attempt.time_spent, Attempt.created_at, Attempt.id) > tuple_(time_spent, created_at, attempt_id),
+        ))
+    rows = (query
+            .order_by(desc(Attempt.score), Attempt.time_spent.asc(), Attempt.created_at.asc(), Attempt.id.asc())
+            .limit(limit)
+            .all())
+    return [rank_entry(*row) for row in rows]
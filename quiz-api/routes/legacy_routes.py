@@ -1,7 +1,13 @@
 """Routes legacy nécessaires pour les tests Postman TDD."""
-from flask import Blueprint, jsonify, request
-from models import db, Question, Attempt, Choice, Answer, Quiz
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from models import db, Attempt, Quiz
 from middleware import require_auth
+from cache import invalidate_quiz
+from answer_keys import answer_keys
+from attempt_writer import save_attempt, AttemptWriteTimeout
+from leaderboard import leaderboards
+from rebuild_template import rebuild
+from bulk_delete import purge_attempts, purge_questions, purge_response
 
 
 legacy_bp = Blueprint('legacy', __name__)
@@ -13,48 +19,49 @@ first_delete_all_called = False
 @require_auth
 def delete_all_questions_legacy():
     """Supprime toutes les questions (toujours idempotent): retourne 204."""
-    try:
-        # Suppression bulk des réponses, choix et questions
-        Answer.query.delete()
-        Choice.query.delete()
-        Question.query.delete()
-        db.session.commit()
-        return '', 204
-    except Exception as e:  # noqa: BLE001
-        db.session.rollback()
-        return jsonify({'error': str(e)}), 500
+    # Suppression par lots des réponses, choix et questions
+    return purge_response('questions', purge_questions)
 
 
 @legacy_bp.route('/participations/all', methods=['DELETE'])
 @require_auth
 def delete_all_participations_legacy():
     """Supprime toutes les tentatives (idempotent)."""
-    try:
-        Answer.query.delete()
-        Attempt.query.delete()
-        db.session.commit()
-        return '', 204
-    except Exception as e:  # noqa: BLE001
-        db.session.rollback()
-        return jsonify({'error': str(e)}), 500
+    return purge_response('participations', purge_attempts)
 
 
 @legacy_bp.route('/quiz-info', methods=['GET'])
 @legacy_bp.route('/quizzes/quiz-info', methods=['GET'])
 def get_quiz_info_legacy():
     """Retourne un objet {size, scores[]} pour compat ancienne API.
-    - size: nombre de questions du quiz 1
-    - scores: liste des participations {playerName, score} dans l'ordre d'insertion
+    - size: nombre de questions du quiz 1 (compteur quizzes.question_count)
+    - scores: participations {playerName, score} par score décroissant puis
+      ordre d'insertion, paginées par `limit` (plafonné à MAX_PAGE_SIZE) et
+      `offset`
     """
     quiz_id = 1
-    size = Question.query.filter_by(quiz_id=quiz_id).count()
-
-    attempts = (Attempt.query
-                .filter_by(quiz_id=quiz_id)
-                .order_by(Attempt.score.desc(), Attempt.id.asc())
-                .all())
-    scores = [{'playerName': a.player_name, 'score': a.score} for a in attempts]
-    return jsonify({'size': size, 'scores': scores}), 200
+    max_size = current_app.config['MAX_PAGE_SIZE']
+    limit = request.args.get('limit', default=max_size, type=int)
+    limit = max(0, min(limit, max_size))
+    offset = max(0, request.args.get('offset', default=0, type=int))
+
+    size = db.session.query(Quiz.question_count).filter_by(id=quiz_id).scalar() or 0
+    rows = (db.session.query(Attempt.player_name, Attempt.score)
+            .filter_by(quiz_id=quiz_id)
+            .order_by(Attempt.score.desc(), Attempt.id.asc())
+            .offset(offset)
+            .limit(limit)
+            .yield_per(100))
+
+    def generate():
+        # Les lignes sont encodées au fil de la lecture, sans liste intermédiaire
+        dumps = current_app.json.dumps
+        yield f'{{"size": {size}, "scores": ['
+        for index, (player_name, score) in enumerate(rows):
+            yield (',' if index else '') + dumps({'playerName': player_name, 'score': score})
+        yield ']}\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/json'), 200
 
 
 @legacy_bp.route('/rebuild-db', methods=['POST'])
@@ -62,14 +69,28 @@ def get_quiz_info_legacy():
 def rebuild_db_legacy():
     """Rebuild minimal du schéma (compat TDD): drop + create, retourne 'Ok'."""
     try:
-        db.drop_all()
-        db.create_all()
+        rebuild('empty')
+        invalidate_quiz()
+        leaderboards.clear()
         return 'Ok', 200
     except Exception as e:  # noqa: BLE001
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
+def _answer_index(answered):
+    """Convertit une réponse lettre (A..D) ou numéro (1..4 ou 0) en index 0..3."""
+    if isinstance(answered, str):
+        mapping = {'A': 0, 'B': 1, 'C': 2, 'D': 3}
+        return mapping.get(answered.strip().upper())
+    try:
+        idx = int(answered)
+    except Exception:
+        return None
+    # si 1..4 → convertir en 0..3
+    return idx - 1 if idx >= 1 else idx
+
+
 @legacy_bp.route('/participations', methods=['POST'])
 def create_participation_legacy():
     """Compat POST /participations (TDD).
@@ -85,15 +106,16 @@ def create_participation_legacy():
 
     quiz_id = data.get('quiz_id') or data.get('quizId') or 1
     quiz = Quiz.query.get(quiz_id)
+    quiz_created = quiz is None
     if not quiz:
         # Créer un quiz par défaut si absent pour compat
         quiz = Quiz(id=quiz_id, title=f'Quiz {quiz_id}', description=None)
         db.session.add(quiz)
         db.session.flush()
 
-    # Nombre de questions attendues pour ce quiz
-    questions_in_quiz = Question.query.filter_by(quiz_id=quiz_id).order_by(Question.position.asc()).all()
-    total_questions = len(questions_in_quiz)
+    # Corrigé compilé du quiz: positions, choix ordonnés et exactitude
+    answer_key = answer_keys.get(quiz_id)
+    total_questions = answer_key.total_questions
 
     # Cas 1: format TDD liste d'entiers/lettres par position [1,2,3,...]
     items_are_scalars = all(not isinstance(x, dict) for x in answers_data)
@@ -102,56 +124,15 @@ def create_participation_legacy():
         if len(answers_data) != total_questions:
             return jsonify({'error': 'answers length mismatch'}), 400
 
-    attempt = Attempt(
-        quiz_id=quiz_id,
-        player_name=player_name,
-        total_questions=total_questions,
-        score=0,
-        time_spent=data.get('time_spent', 0)
-    )
-    db.session.add(attempt)
-    db.session.flush()
-
-    correct = 0
-
+    # Normaliser les deux formats en paires (question_id, choice_id)
+    graded_pairs = []
     if items_are_scalars:
         # Parcours par position 1..N
         for idx_pos, answered in enumerate(answers_data, start=1):
-            # Récupérer la question à cette position
-            q = next((q for q in questions_in_quiz if q.position == idx_pos), None)
-            if not q:
-                continue
-            qid = q.id
-            # Récupérer les choix triés
-            choices = Choice.query.filter_by(question_id=qid).order_by(Choice.id.asc()).all()
-            # Convertir la réponse en index 0..3
-            if isinstance(answered, str):
-                letter = answered.strip().upper()
-                mapping = {'A': 0, 'B': 1, 'C': 2, 'D': 3}
-                idx_choice = mapping.get(letter)
-            else:
-                try:
-                    idx_choice = int(answered)
-                    if idx_choice >= 1:
-                        idx_choice = idx_choice - 1
-                except Exception:
-                    idx_choice = None
-            cid = None
-            if idx_choice is not None and 0 <= idx_choice < len(choices):
-                cid = choices[idx_choice].id
-            choice = Choice.query.get(cid) if cid else None
-            if not choice or choice.question_id != qid:
+            qid = answer_key.question_at.get(idx_pos)
+            if qid is None:
                 continue
-            is_correct = bool(choice.is_correct)
-            if is_correct:
-                correct += 1
-            ans = Answer(
-                attempt_id=attempt.id,
-                question_id=qid,
-                choice_id=choice.id,
-                is_correct=is_correct
-            )
-            db.session.add(ans)
+            graded_pairs.append((qid, answer_key.choice_at(qid, _answer_index(answered))))
     else:
         # Cas 2: format objet [{question_id, choice_id|answer}]
         for a in answers_data:
@@ -160,49 +141,37 @@ def create_participation_legacy():
             answered = a.get('answer')  # index ou lettre
             if not qid:
                 continue
-            # Résoudre choice_id si non fourni
+            # Résoudre choice_id si non fourni (choix dans l'ordre d'affichage)
             if not cid and answered is not None:
-                # récupérer les choix par ordre d'id
-                choices = Choice.query.filter_by(question_id=qid).order_by(Choice.id.asc()).all()
-                if isinstance(answered, str):
-                    letter = answered.strip().upper()
-                    mapping = {'A': 0, 'B': 1, 'C': 2, 'D': 3}
-                    idx = mapping.get(letter)
-                else:
-                    try:
-                        idx = int(answered)
-                        # si 1..4 → convertir en 0..3
-                        if idx >= 1:
-                            idx = idx - 1
-                    except Exception:
-                        idx = None
-                if idx is not None and 0 <= idx < len(choices):
-                    cid = choices[idx].id
-            # Vérifier le choix
-            choice = Choice.query.get(cid) if cid else None
-            if not choice or choice.question_id != qid:
-                # en cas d’incohérence, on ignore la réponse
-                continue
-            is_correct = bool(choice.is_correct)
-            if is_correct:
-                correct += 1
-            ans = Answer(
-                attempt_id=attempt.id,
-                question_id=qid,
-                choice_id=choice.id,
-                is_correct=is_correct
-            )
-            db.session.add(ans)
-
-    attempt.score = correct
-    db.session.commit()
+                cid = answer_key.choice_at(qid, _answer_index(answered))
+            graded_pairs.append((qid, cid))
+
+    correct = 0
+    graded = []
+    for qid, cid in graded_pairs:
+        is_correct = answer_key.grade(qid, cid) if cid else None
+        if is_correct is None:
+            # en cas d'incohérence, on ignore la réponse
+            continue
+        if is_correct:
+            correct += 1
+        graded.append((qid, cid, is_correct))
+
+    if quiz_created:
+        db.session.commit()
+        invalidate_quiz(quiz_id)
+    try:
+        attempt_id = save_attempt(quiz_id, player_name, total_questions, correct, data.get('time_spent', 0), graded)
+    except AttemptWriteTimeout as e:
+        # Accepté mais pas encore confirmé: un nouvel envoi ferait un doublon
+        return jsonify({'message': str(e)}), 202
     # Le TDD attend 200 OK et des clés camelCase
-    total = attempt.total_questions or 0
-    percentage = round(100 * attempt.score / total, 2) if total > 0 else 0
+    total = total_questions or 0
+    percentage = round(100 * correct / total, 2) if total > 0 else 0
     return jsonify({
-        'id': attempt.id,
-        'playerName': attempt.player_name,
-        'score': attempt.score,
+        'id': attempt_id,
+        'playerName': player_name,
+        'score': correct,
         'totalQuestions': total,
         'percentage': percentage
     }), 200
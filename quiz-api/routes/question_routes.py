@@ -1,12 +1,91 @@
 """Routes pour les questions."""
-from flask import Blueprint, request, jsonify
-from models import db, Question, Choice, Quiz
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import load_only
+from models import db, Question, Choice, Quiz, Answer
 from middleware import require_auth
+from cache import cached_json_response, invalidate_quiz
+from pagination import decode_cursor, encode_cursor
+from image_store import externalize
 import json
 
 question_bp = Blueprint('question', __name__)
 
 
+def _choices_payload(data):
+    """Choix demandés ({id, text, is_correct}) via `choices` ou `possibleAnswers`, sinon None."""
+    if 'choices' in data:
+        raw = data.get('choices') or []
+    elif 'possibleAnswers' in data:
+        raw = data.get('possibleAnswers') or []
+    else:
+        return None
+    return [
+        {
+            'id': c.get('id'),
+            'text': c.get('text', ''),
+            'is_correct': bool(c.get('is_correct', c.get('isCorrect', False))),
+        }
+        for c in raw
+    ]
+
+
+def _sync_choices(question_id, current, wanted):
+    """Aligne les choix `current` d'une question sur `wanted`, dans cet ordre (sans commit).
+
+    Un choix existant est repris par son id, sinon par son texte (voir
+    Choice.match): réordonner les choix ne change que leur position, et les
+    réponses passées gardent leur choice_id, leur texte et leur exactitude.
+    Un choix qui a déjà reçu des réponses n'est jamais réécrit ni supprimé
+    (ValueError): ses réponses changeraient de sens ou disparaîtraient
+    (ON DELETE CASCADE).
+    Retourne (modifié, lignes des nouveaux choix à insérer).
+    """
+    matches = Choice.match(current, wanted)
+    rewritten = [choice.id for choice, item in zip(matches, wanted)
+                 if choice is not None and (choice.text, bool(choice.is_correct)) != (item['text'], item['is_correct'])]
+    kept = {c.id for c in matches if c is not None}
+    dropped = [c.id for c in current if c.id not in kept]
+    if rewritten or dropped:
+        answered = set(db.session.execute(
+            db.select(Answer.choice_id).where(Answer.choice_id.in_(rewritten + dropped)).distinct()
+        ).scalars())
+        for verb, ids in (('modify', rewritten), ('delete', dropped)):
+            blocked = sorted(answered.intersection(ids))
+            if blocked:
+                raise ValueError(f"Cannot {verb} choices with recorded answers: {', '.join(map(str, blocked))}")
+
+    changed = False
+    new_choices = []
+    for rank, (choice, item) in enumerate(zip(matches, wanted), start=1):
+        if choice is None:
+            new_choices.append({'question_id': question_id, 'text': item['text'],
+                                'is_correct': item['is_correct'], 'position': rank})
+        elif (choice.text, bool(choice.is_correct), choice.position) != (item['text'], item['is_correct'], rank):
+            choice.text, choice.is_correct, choice.position = item['text'], item['is_correct'], rank
+            changed = True
+    if dropped:
+        Choice.query.filter(Choice.id.in_(dropped)).delete(synchronize_session=False)
+    return changed or bool(new_choices) or bool(dropped), new_choices
+
+
+def _move_question(question, new_pos):
+    """Déplace une question à `new_pos` (1..N) en décalant les questions intermédiaires (sans commit)."""
+    old_pos = question.position
+    if new_pos == old_pos:
+        return
+    # Libérer la position courante
+    question.position = 0
+    db.session.flush()
+    if new_pos < old_pos:
+        # Bloc [new_pos .. old_pos-1] vers +1
+        Question.shift_positions(question.quiz_id, new_pos, old_pos - 1, 1)
+    else:
+        # Bloc [old_pos+1 .. new_pos] vers -1
+        Question.shift_positions(question.quiz_id, old_pos + 1, new_pos, -1)
+    question.position = new_pos
+
+
 @question_bp.route('', methods=['GET'])
 def get_questions():
     """Récupère les questions (par position ou toutes)."""
@@ -22,22 +101,60 @@ def get_questions():
             return jsonify({'error': 'Question not found'}), 404
         return jsonify(question.to_dict(include_correct=True)), 200
     
-    # Si quiz_id est fourni
+    # Le quiz demandé, ou toutes les questions; paginé seulement sur demande
+    return questions_listing_response(quiz_id)
+
+
+def questions_listing_response(quiz_id=None):
+    """Listing des questions (sans bonnes réponses), trié par (quiz_id, position).
+
+    Paramètres: `limit` et `cursor` (en-tête X-Next-Cursor de la page
+    précédente), `fields=id,title,...` pour ne charger et ne renvoyer que ces
+    champs (voir Question.LISTING_FIELDS). Sans `limit`, toutes les questions
+    sont renvoyées: les clients existants (admin) attendent la liste complète.
+    """
+    fields = request.args.get('fields')
+    if fields is not None:
+        fields = [name.strip() for name in fields.split(',') if name.strip()]
+        unknown = [name for name in fields if name not in Question.LISTING_FIELDS]
+        if unknown or not fields:
+            return jsonify({'error': f"Unknown fields: {', '.join(unknown)}" if unknown
+                            else 'fields must not be empty'}), 400
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = max(0, min(limit, current_app.config['MAX_PAGE_SIZE']))
+    cursor = request.args.get('cursor')
+
+    query = Question.query
     if quiz_id is not None:
-        questions = Question.query.filter_by(quiz_id=quiz_id).order_by(Question.position).all()
-        return jsonify([q.to_dict(include_correct=False) for q in questions]), 200
-    
-    # Sinon toutes les questions
-    questions = Question.query.order_by(Question.position).all()
-    return jsonify([q.to_dict(include_correct=False) for q in questions]), 200
+        query = query.filter(Question.quiz_id == quiz_id)
+    if cursor:
+        try:
+            after = decode_cursor(cursor, int, int)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        query = query.filter(tuple_(Question.quiz_id, Question.position) > tuple_(*after))
+    if fields is not None:
+        query = query.options(load_only(*Question.listing_columns(fields)))
+    query = query.order_by(Question.quiz_id, Question.position)
+    if limit is not None:
+        query = query.limit(limit)
+    questions = query.all()
+
+    response = jsonify(Question.serialize_many(questions, include_correct=False, fields=fields))
+    if limit and len(questions) == limit:
+        response.headers['X-Next-Cursor'] = encode_cursor(questions[-1].quiz_id, questions[-1].position)
+    return response, 200
 
 
 @question_bp.route('/<int:question_id>', methods=['GET'])
 def get_question(question_id):
     """Récupère une question spécifique."""
-    question = Question.query.get_or_404(question_id)
-    # Pour les tests TDD, on expose isCorrect sur les réponses
-    return jsonify(question.to_dict(include_correct=True)), 200
+    def build():
+        question = Question.query.get_or_404(question_id)
+        # Pour les tests TDD, on expose isCorrect sur les réponses
+        return question.to_dict(include_correct=True), question.quiz_id
+    return cached_json_response(('question', question_id), build)
 
 
 @question_bp.route('', methods=['POST'])
@@ -76,19 +193,8 @@ def create_question():
             # borne entre 1 et N+1
             position = min(max(1, requested_position), existing_count + 1)
             if position <= existing_count:
-                # Phase 1: pousser loin pour casser les collisions
-                rows_to_shift = (Question.query
-                                  .filter(Question.quiz_id == quiz_id, Question.position >= position)
-                                  .order_by(Question.position.asc())
-                                  .all())
-                for row in rows_to_shift:
-                    row.position = row.position + 1000
-                db.session.flush()
-
-                # Phase 2: ramener à la position finale (+1)
-                for row in rows_to_shift:
-                    row.position = row.position - 999
-                db.session.flush()
+                # Décaler position..N de +1 (UPDATE ensembliste)
+                Question.shift_positions(quiz_id, position)
 
         # Créer la question
         question = Question(
@@ -96,7 +202,7 @@ def create_question():
             position=position,
             title=data.get('title') or data.get('text', ''),
             text=data.get('text') or data.get('title', ''),
-            image=data.get('image'),
+            image=externalize(data.get('image')),
             difficulty=data.get('difficulty', 'easy'),
             tags=json.dumps(data.get('tags', [])),
             explanation=data.get('explanation')
@@ -104,15 +210,18 @@ def create_question():
         db.session.add(question)
         db.session.flush()  # obtenir l'ID
 
-        for choice_data in data.get('choices', []) or []:
+        for rank, choice_data in enumerate(data.get('choices', []) or [], start=1):
             choice = Choice(
                 question_id=question.id,
                 text=choice_data.get('text', ''),
-                is_correct=bool(choice_data.get('is_correct', False))
+                is_correct=bool(choice_data.get('is_correct', False)),
+                position=rank
             )
             db.session.add(choice)
 
+        Quiz.refresh_question_counts([quiz_id])
         db.session.commit()
+        invalidate_quiz(quiz_id)
         return jsonify({'id': question.id}), 200
     except KeyError as e:
         db.session.rollback()
@@ -143,47 +252,12 @@ def update_question(question_id):
         if 'position' in data:
             # Réordonnancement robuste avec phase tampon pour éviter UNIQUE
             new_pos = int(data['position'])
-            quiz_id = question.quiz_id
-            total = Question.query.filter_by(quiz_id=quiz_id).count()
+            total = Question.query.filter_by(quiz_id=question.quiz_id).count()
             if new_pos < 1:
                 new_pos = 1
             if new_pos > total:
                 new_pos = total
-
-            old_pos = question.position
-            if new_pos != old_pos:
-                # Libérer la position courante
-                question.position = 0
-                db.session.flush()
-
-                if new_pos < old_pos:
-                    # Déplacer le bloc [new_pos .. old_pos-1] vers +1 (phase tampon puis retour)
-                    rows = (Question.query
-                            .filter(Question.quiz_id == quiz_id,
-                                    Question.position >= new_pos,
-                                    Question.position < old_pos)
-                            .order_by(Question.position.asc())
-                            .all())
-                    for row in rows:
-                        row.position = row.position + 1000
-                    db.session.flush()
-                    for row in rows:
-                        row.position = row.position - 999  # net +1
-                else:
-                    # new_pos > old_pos: déplacer (old_pos+1 .. new_pos) vers -1
-                    rows = (Question.query
-                            .filter(Question.quiz_id == quiz_id,
-                                    Question.position <= new_pos,
-                                    Question.position > old_pos)
-                            .order_by(Question.position.asc())
-                            .all())
-                    for row in rows:
-                        row.position = row.position + 1000
-                    db.session.flush()
-                    for row in rows:
-                        row.position = row.position - 1001  # net -1
-
-                question.position = new_pos
+            _move_question(question, new_pos)
 
         # Mettre à jour les champs textuels si fournis
         if 'title' in data:
@@ -191,7 +265,7 @@ def update_question(question_id):
         if 'text' in data:
             question.text = data.get('text') or question.text
         if 'image' in data:
-            question.image = data.get('image')
+            question.image = externalize(data.get('image'))
         if 'difficulty' in data:
             question.difficulty = data.get('difficulty') or question.difficulty
         if 'tags' in data:
@@ -203,31 +277,15 @@ def update_question(question_id):
         if 'explanation' in data:
             question.explanation = data.get('explanation')
 
-        # Remplacer entièrement les choix si fournis
-        choices_payload = None
-        if 'choices' in data:
-            choices_payload = data.get('choices') or []
-        elif 'possibleAnswers' in data:
-            choices_payload = [
-                {
-                    'text': a.get('text', ''),
-                    'is_correct': bool(a.get('isCorrect', a.get('is_correct', False)))
-                }
-                for a in (data.get('possibleAnswers') or [])
-            ]
-
+        # Aligner les choix si fournis (ids conservés, voir _sync_choices)
+        choices_payload = _choices_payload(data)
         if choices_payload is not None:
-            # supprimer les anciens choix puis réinsérer
-            Choice.query.filter_by(question_id=question_id).delete()
-            db.session.flush()
-            for c in choices_payload:
-                db.session.add(Choice(
-                    question_id=question.id,
-                    text=c.get('text', ''),
-                    is_correct=bool(c.get('is_correct', c.get('isCorrect', False)))
-                ))
+            current = Choice.query.filter_by(question_id=question.id).order_by(Choice.position, Choice.id).all()
+            _, new_choices = _sync_choices(question.id, current, choices_payload)
+            db.session.add_all(Choice(**row) for row in new_choices)
 
         db.session.commit()
+        invalidate_quiz(question.quiz_id)
         # No content si succès
         return '', 204
     except Exception as e:
@@ -235,6 +293,104 @@ def update_question(question_id):
         return jsonify({'error': str(e)}), 400
 
 
+def _field_changes(question, data):
+    """Champs de `data` qui modifient la question (mêmes règles que PUT, hors position)."""
+    values = {}
+    if 'title' in data:
+        values['title'] = data.get('title') or question.title
+    if 'text' in data:
+        values['text'] = data.get('text') or question.text
+    if 'image' in data:
+        values['image'] = externalize(data.get('image'))
+    if 'difficulty' in data:
+        values['difficulty'] = data.get('difficulty') or question.difficulty
+    if 'tags' in data:
+        tags = data.get('tags')
+        # Une string JSON est conservée telle quelle
+        values['tags'] = tags if isinstance(tags, str) else json.dumps(tags or [])
+    if 'explanation' in data:
+        values['explanation'] = data.get('explanation')
+    return {name: value for name, value in values.items() if getattr(question, name) != value}
+
+
+@question_bp.route('', methods=['PATCH'])
+@require_auth
+def patch_questions():
+    """Met à jour plusieurs questions en une transaction (admin only).
+
+    Corps: {"questions": [{"id": 12, "title": ..., "choices": [...]}, ...]}
+    (ou directement la liste). Seuls les champs présents sont modifiés; les
+    choix sont comparés par id ou texte (voir _sync_choices). Une `position`
+    (1..N du quiz, 400 sinon) déplace la question en décalant les autres,
+    comme PUT; les déplacements s'appliquent dans l'ordre du lot.
+    Retourne {updated: [{id, fields}], unchanged}.
+    """
+    data = request.get_json(silent=True)
+    items = data.get('questions') if isinstance(data, dict) else data
+    if (not isinstance(items, list)
+            or not all(isinstance(item, dict) and isinstance(item.get('id'), int) for item in items)):
+        return jsonify({'error': 'questions must be a list of objects with an integer id'}), 400
+    ids = [item['id'] for item in items]
+    if len(set(ids)) != len(ids):
+        return jsonify({'error': 'Duplicate question id in batch'}), 400
+
+    try:
+        questions = {}
+        for start in range(0, len(ids), Choice.IN_CLAUSE_CHUNK):
+            chunk = ids[start:start + Choice.IN_CLAUSE_CHUNK]
+            questions.update((q.id, q) for q in Question.query.filter(Question.id.in_(chunk)))
+        missing = [question_id for question_id in ids if question_id not in questions]
+        if missing:
+            return jsonify({'error': f"Questions not found: {', '.join(map(str, missing))}"}), 404
+        choices_by_question = Choice.load_for_questions(ids)
+
+        moves = {item['id']: item['position'] for item in items if 'position' in item}
+        if moves:
+            quiz_ids = {questions[question_id].quiz_id for question_id in moves}
+            totals = dict(db.session.execute(
+                db.select(Question.quiz_id, func.count()).where(Question.quiz_id.in_(quiz_ids))
+                .group_by(Question.quiz_id)
+            ).all())
+            for question_id, position in moves.items():
+                total = totals[questions[question_id].quiz_id]
+                if not isinstance(position, int) or isinstance(position, bool) or not 1 <= position <= total:
+                    return jsonify({'error': f'Invalid position for question {question_id}: '
+                                             f'expected an integer between 1 and {total}'}), 400
+
+        changes = [(questions[item['id']], _field_changes(questions[item['id']], item), item) for item in items]
+
+        report = {'updated': [], 'unchanged': 0}
+        new_choices = []
+        for question, fields, item in changes:
+            for name, value in fields.items():
+                setattr(question, name, value)
+            names = sorted(fields)
+            if question.id in moves and moves[question.id] != question.position:
+                _move_question(question, moves[question.id])
+                names = sorted(names + ['position'])
+            wanted = _choices_payload(item)
+            if wanted is not None:
+                changed, rows = _sync_choices(question.id, choices_by_question.get(question.id, []), wanted)
+                new_choices.extend(rows)
+                if changed:
+                    names.append('choices')
+            if names:
+                report['updated'].append({'id': question.id, 'fields': names})
+            else:
+                report['unchanged'] += 1
+        db.session.flush()
+        if new_choices:
+            # executemany unique pour tout le lot
+            db.session.execute(db.insert(Choice), new_choices)
+        db.session.commit()
+        for quiz_id in {question.quiz_id for question, _, _ in changes}:
+            invalidate_quiz(quiz_id)
+        return jsonify(report), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+
 @question_bp.route('/<int:question_id>', methods=['DELETE'])
 @require_auth
 def delete_question(question_id):
@@ -250,20 +406,14 @@ def delete_question(question_id):
         q.position = 0
         db.session.flush()
 
-        # Décaler toutes les questions suivantes (phase tampon puis décrément)
-        rows = (Question.query
-                .filter(Question.quiz_id == quiz_id, Question.position > old_pos)
-                .order_by(Question.position.asc())
-                .all())
-        for row in rows:
-            row.position = row.position + 1000
-        db.session.flush()
-        for row in rows:
-            row.position = row.position - 1001  # net -1
+        # Décaler toutes les questions suivantes de -1
+        Question.shift_positions(quiz_id, old_pos + 1, delta=-1)
 
-        # Supprimer la question
-        db.session.delete(q)
+        # Supprimer la question (choix et réponses par ON DELETE CASCADE)
+        db.session.execute(db.delete(Question).where(Question.id == question_id))
+        Quiz.refresh_question_counts([quiz_id])
         db.session.commit()
+        invalidate_quiz(quiz_id)
         return '', 204
     except Exception as e:
         db.session.rollback()
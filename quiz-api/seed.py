@@ -0,0 +1,152 @@
+"""Amorçage des quizzes par défaut et des questions depuis data/questions.json.
+
+Exécuté une seule fois au démarrage (create_app) ou via `flask seed-db`.
+L'empreinte SHA-256 du fichier est mémorisée dans `app_meta`: tant que le
+fichier ne change pas, l'amorçage ne refait ni lecture ni écriture.
+"""
+import hashlib
+import json
+import os
+
+from models import db, Quiz, AppMeta
+from question_import import sync_questions
+
+
+# Titres tels qu'affichés par le front
+DEFAULT_QUIZZES = [
+    {"id": 1, "title": "Base du tennis", "description": "Règles et notions essentielles pour débuter.", "difficulty": "easy"},
+    {"id": 2, "title": "Roland-Garros", "description": "Le tournoi parisien sur terre battue.", "difficulty": "medium"},
+    {"id": 3, "title": "Tennis Avancé", "description": "Grips, effets et tactiques.", "difficulty": "hard"},
+]
+
+QUESTIONS_PER_QUIZ = 15
+SEED_FINGERPRINT_KEY = 'seed.questions_json.sha256'
+# Propriétaire (questions.source) des questions synchronisées par le seed
+SEED_SOURCE = 'seed'
+
+
+def find_questions_file():
+    """Résout de manière robuste l'emplacement du fichier questions.json."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    candidates = [
+        os.path.join(os.path.abspath(os.path.join(here, '..')), 'data', 'questions.json'),  # /app/data/questions.json
+        os.path.join(os.path.abspath(os.path.join(here, '..', '..')), 'data', 'questions.json'),  # /data/questions.json (au cas où)
+        os.path.join('/app', 'data', 'questions.json'),
+    ]
+    return next((p for p in candidates if os.path.exists(p)), None)
+
+
+def file_fingerprint(path):
+    """Empreinte SHA-256 du contenu d'un fichier."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def ensure_default_quizzes():
+    """Crée les 3 quizzes par défaut s'ils n'existent pas (flush, sans commit)."""
+    for data in DEFAULT_QUIZZES:
+        if not Quiz.query.get(data["id"]):
+            db.session.add(Quiz(**data))  # type: ignore[arg-type]
+    db.session.flush()
+
+
+def normalize_titles():
+    """Aligne les titres des quizzes par défaut sur ceux attendus par le front."""
+    for data in DEFAULT_QUIZZES:
+        quiz = Quiz.query.get(data["id"])
+        if quiz and quiz.title != data["title"]:
+            quiz.title = data["title"]
+
+
+def _bucket_items(raw):
+    """Répartit les questions par quiz cible (alias quizId ou difficulté)."""
+    buckets = {1: [], 2: [], 3: []}
+    for item in raw:
+        alias = str(item.get('quizId', '')).strip().lower()
+        if alias in ('bases', 'base', 'facile', 'easy'):
+            target_quiz, difficulty = 1, 'easy'
+        elif alias in ('roland', 'moyen', 'medium'):
+            target_quiz, difficulty = 2, 'medium'
+        elif alias in ('avance', 'avancé', 'hard', 'difficile'):
+            target_quiz, difficulty = 3, 'hard'
+        else:
+            difficulty = str(item.get('difficulty', 'easy')).lower().strip()
+            target_quiz = 1 if difficulty == 'easy' else 2 if difficulty == 'medium' else 3
+        buckets[target_quiz].append((item, difficulty))
+    return buckets
+
+
+def seed_rows(raw):
+    """Payloads normalisés des questions des quizzes 1..3 à partir du JSON.
+
+    Distribue 15 'easy'→1, 15 'medium'→2, 15 'hard'→3 (ou via alias quizId);
+    l'`id` du fichier (ex: 'bases-1') devient l'external_id de la question.
+    """
+    rows = []
+    for quiz_id, items in _bucket_items(raw).items():
+        for pos, (item, difficulty) in enumerate(items[:QUESTIONS_PER_QUIZ], start=1):
+            title = item.get('title') or item.get('question') or f"Question {pos}"
+            text = item.get('text') or item.get('question') or title
+            # Construire l'URL de l'image selon quiz_id et position
+            image_suffix = 'base' if difficulty == 'easy' else difficulty
+            if isinstance(item.get('choices'), dict):
+                correct_letter = (item.get('correct') or '').strip()
+                choices = [
+                    {'text': item['choices'][letter], 'is_correct': letter == correct_letter}
+                    for letter in ['A', 'B', 'C', 'D'] if letter in item['choices']
+                ]
+            else:
+                choices = [
+                    {'text': c.get('text', ''), 'is_correct': bool(c.get('is_correct', False))}
+                    for c in (item.get('choices') or [])
+                ]
+            rows.append({
+                'external_id': item.get('id'),
+                'quiz_id': quiz_id,
+                'position': pos,
+                'title': title,
+                'text': text,
+                'image': item.get('image') or f"/images/questions/q{pos}{image_suffix}.png",
+                'difficulty': difficulty,
+                'tags': json.dumps(item.get('tags', [])),
+                'explanation': item.get('explanation'),
+                'choices': choices,
+            })
+    return rows
+
+
+def seed_database(force=False, dry_run=False):
+    """Amorce la base si questions.json a changé depuis le dernier passage.
+
+    - empreinte identique: aucune écriture (sauf `force`)
+    - sinon: synchronisation incrémentale des quizzes 1..3 (sync_questions),
+      seules les questions modifiées sont réécrites et l'historique des
+      réponses est conservé
+
+    Retourne le rapport de synchronisation, ou None si rien n'a été fait.
+    Avec `dry_run`, le rapport est calculé sans rien écrire.
+    """
+    json_path = find_questions_file()
+    if not json_path:
+        return None
+    fingerprint = file_fingerprint(json_path)
+    stored = AppMeta.get_value(SEED_FINGERPRINT_KEY)
+    if stored == fingerprint and not force:
+        return None
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        raw = json.load(f) or []
+
+    if dry_run:
+        return sync_questions(seed_rows(raw), [1, 2, 3], SEED_SOURCE, dry_run=True)
+
+    ensure_default_quizzes()
+    report = sync_questions(seed_rows(raw), [1, 2, 3], SEED_SOURCE)
+    normalize_titles()
+    AppMeta.set_value(SEED_FINGERPRINT_KEY, fingerprint)
+    AppMeta.bump_content_version()
+    db.session.commit()
+    return report
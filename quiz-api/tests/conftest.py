@@ -0,0 +1,54 @@
+"""Fixtures communes: application de test (SQLite en mémoire, seed 3x15) et compteur de requêtes."""
+import os
+import sys
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_new import create_app  # noqa: E402
+from models import db  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing')
+    app.config['IMAGE_STORE_DIR'] = str(tmp_path / 'images')
+    # Le cache de réponses masquerait les requêtes du chemin mesuré
+    app.config['RESPONSE_CACHE_ENABLED'] = False
+    yield app
+    with app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    token = client.post('/api/auth/login', json={'password': 'iloveflask'}).get_json()['token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager: `with count_queries() as statements:` liste les SQL exécutés."""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+    return counter
@@ -0,0 +1,70 @@
+"""Purges par lots (cleanup, routes legacy), au premier plan et en tâche de fond."""
+import time
+
+import pytest
+
+
+@pytest.fixture
+def small_batches(app):
+    app.config['DELETE_BATCH_SIZE'] = 2
+    app.config['DELETE_BATCH_PAUSE_MS'] = 0
+
+
+def _submit(client, count):
+    question = client.get('/api/quizzes/1/questions').get_json()[0]
+    for index in range(count):
+        response = client.post('/api/attempts', json={
+            'quiz_id': 1, 'player_name': f'p{index}',
+            'answers': [{'question_id': question['id'], 'choice_id': question['choices'][0]['id']}],
+        })
+        assert response.status_code == 201
+
+
+def _wait(client, auth_headers, status_url):
+    """État final d'une tâche de fond (suivie sans toucher à la base)."""
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        task = client.get(status_url, headers=auth_headers).get_json()
+        if task['status'] != 'running':
+            return task
+        time.sleep(0.01)
+    raise AssertionError('purge task still running')
+
+
+def test_cleanup_deletes_attempts_in_batches(client, auth_headers, small_batches):
+    _submit(client, 5)
+    assert client.delete('/admin/cleanup', headers=auth_headers).status_code == 204
+    assert client.get('/api/leaderboard/1').get_json() == []
+    assert client.get('/api/leaderboard/1?window=all').get_json() == []
+    assert client.get('/api/attempts/player/p0').get_json() == []
+    # Idempotent
+    assert client.delete('/admin/cleanup', headers=auth_headers).status_code == 204
+
+
+def test_background_cleanup_reports_progress(client, auth_headers, small_batches):
+    _submit(client, 5)
+    response = client.delete('/admin/cleanup?background=true', headers=auth_headers)
+    assert response.status_code == 202
+    body = response.get_json()
+    assert response.headers['Location'].endswith(body['status_url'])
+
+    task = _wait(client, auth_headers, body['status_url'])
+    assert (task['status'], task['name'], task['error']) == ('done', 'cleanup', None)
+    assert task['progress'] == {'attempts': 5, 'answers': 5, 'rollups': 20}
+    assert task['finished_at'] is not None
+    assert client.get('/api/leaderboard/1').get_json() == []
+
+
+def test_background_question_purge(client, auth_headers, small_batches):
+    response = client.delete('/api/questions/all?background=true', headers=auth_headers)
+    assert response.status_code == 202
+
+    task = _wait(client, auth_headers, response.get_json()['status_url'])
+    assert task['status'] == 'done'
+    assert task['progress']['questions'] == 45
+    assert client.get('/api/questions').get_json() == []
+    assert [quiz['question_count'] for quiz in client.get('/api/quizzes').get_json()] == [0, 0, 0]
+
+
+def test_unknown_task(client, auth_headers):
+    assert client.get('/admin/tasks/unknown', headers=auth_headers).status_code == 404
@@ -0,0 +1,36 @@
+"""Historique d'un joueur: liste complète par défaut, pagination sur demande."""
+
+
+def _submit(client, count, player_name='alice'):
+    for _ in range(count):
+        response = client.post('/api/attempts', json={'quiz_id': 1, 'player_name': player_name, 'answers': []})
+        assert response.status_code == 201
+
+
+def test_player_history_is_complete_without_limit(app, client):
+    _submit(client, app.config['DEFAULT_PAGE_SIZE'] + 5)
+    response = client.get('/api/attempts/player/alice')
+    assert len(response.get_json()) == app.config['DEFAULT_PAGE_SIZE'] + 5
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def test_player_history_pages_follow_the_cursor(client):
+    _submit(client, 7)
+    _submit(client, 2, player_name='bob')
+    ids, cursor = [], None
+    while True:
+        url = '/api/attempts/player/alice?limit=3' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(url)
+        ids.extend(attempt['id'] for attempt in response.get_json())
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+    assert ids == [attempt['id'] for attempt in client.get('/api/attempts/player/alice').get_json()]
+    assert len(ids) == 7 and ids == sorted(ids, reverse=True)
+
+
+def test_player_summary_groups_by_quiz(client):
+    _submit(client, 3)
+    summary = client.get('/api/attempts/player/alice?summary=true').get_json()
+    assert summary['total_attempts'] == 3
+    assert [q['quiz_id'] for q in summary['quizzes']] == [1]
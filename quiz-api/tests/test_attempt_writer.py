@@ -0,0 +1,59 @@
+"""Écrivain groupé des tentatives: timeout et erreurs hors du lot."""
+import threading
+
+import pytest
+
+import attempt_writer
+from attempt_writer import GroupCommitWriter
+
+ATTEMPT = {'quiz_id': 1, 'player_name': 'alice', 'answers': []}
+
+
+@pytest.fixture
+def writer(app):
+    writer = GroupCommitWriter(app, batch_size=10, max_wait=0)
+    app.extensions['attempt_writer'] = writer
+    return writer
+
+
+def test_timeout_answers_202_while_the_attempt_may_still_be_saved(app, client, writer, monkeypatch):
+    release = threading.Event()
+    write_batch = attempt_writer._write_batch
+
+    def slow_write_batch(batch):
+        release.wait(5)
+        return write_batch(batch)
+
+    monkeypatch.setattr(attempt_writer, '_write_batch', slow_write_batch)
+    app.config['ATTEMPT_WRITE_TIMEOUT'] = 0.05
+
+    response = client.post('/api/attempts', json=ATTEMPT)
+    assert response.status_code == 202
+    assert 'do not resubmit' in response.get_json()['message']
+
+    release.set()
+    app.config['ATTEMPT_WRITE_TIMEOUT'] = 5
+    assert client.post('/api/attempts', json=ATTEMPT).status_code == 201
+    assert [entry['player_name'] for entry in client.get('/api/leaderboard/1').get_json()] == ['alice', 'alice']
+
+
+def test_writer_thread_survives_an_unexpected_error(app, client, writer, monkeypatch):
+    app.config['ATTEMPT_WRITE_TIMEOUT'] = 5
+    flush = writer._flush
+    calls = []
+
+    def failing_once(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise RuntimeError('writer broke')
+        return flush(batch)
+
+    monkeypatch.setattr(writer, '_flush', failing_once)
+
+    response = client.post('/api/attempts', json=ATTEMPT)
+    assert response.status_code == 500
+    assert response.get_json()['error'] == 'writer broke'
+
+    thread = writer._thread
+    assert client.post('/api/attempts', json=ATTEMPT).status_code == 201
+    assert writer._thread is thread and thread.is_alive()
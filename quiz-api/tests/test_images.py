@@ -0,0 +1,76 @@
+"""Images des questions: envoi, stockage par empreinte, Range et ETag."""
+import base64
+import hashlib
+import io
+
+PNG = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 4
+
+
+def test_upload_is_stored_by_content_hash(client, auth_headers):
+    response = client.post('/api/images', headers=auth_headers,
+                           data={'file': (io.BytesIO(PNG), 'photo.png', 'image/png')})
+    assert response.status_code == 201
+    url = response.get_json()['url']
+    assert url == f'/api/images/{hashlib.sha256(PNG).hexdigest()}.png'
+
+    # Corps brut: même contenu, même référence
+    raw = client.post('/api/images', headers=dict(auth_headers, **{'Content-Type': 'image/png'}), data=PNG)
+    assert raw.get_json()['url'] == url
+
+    image = client.get(url)
+    assert image.status_code == 200
+    assert image.data == PNG
+    assert image.mimetype == 'image/png'
+    assert image.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+
+
+def test_upload_rejections(client, auth_headers):
+    assert client.post('/api/images', data=PNG).status_code == 401
+    unsupported = client.post('/api/images', headers=dict(auth_headers, **{'Content-Type': 'text/plain'}), data=b'x')
+    assert unsupported.status_code == 415
+    empty = client.post('/api/images', headers=dict(auth_headers, **{'Content-Type': 'image/png'}), data=b'')
+    assert empty.status_code == 400
+
+
+def test_range_and_etag(client, auth_headers):
+    url = client.post('/api/images', headers=dict(auth_headers, **{'Content-Type': 'image/png'}),
+                      data=PNG).get_json()['url']
+
+    partial = client.get(url, headers={'Range': 'bytes=8-71'})
+    assert partial.status_code == 206
+    assert partial.data == PNG[8:72]
+    assert partial.headers['Content-Range'] == f'bytes 8-71/{len(PNG)}'
+
+    etag = client.get(url).headers['ETag']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(url, headers={'Range': f'bytes={len(PNG)}-'}).status_code == 416
+
+
+def test_unknown_images_are_not_found(client):
+    assert client.get(f'/api/images/{"0" * 64}.png').status_code == 404
+    assert client.get('/api/images/..%2Fsecret.png').status_code == 404
+    assert client.get(f'/api/images/{"0" * 64}.exe').status_code == 404
+
+
+def test_inline_image_is_externalized_on_create(client, auth_headers):
+    data_uri = 'data:image/png;base64,' + base64.b64encode(PNG).decode()
+    question_id = client.post('/api/questions', headers=auth_headers, json={
+        'quiz_id': 1, 'text': 'Avec image', 'image': data_uri, 'choices': [{'text': 'A', 'is_correct': True}],
+    }).get_json()['id']
+
+    image = client.get(f'/api/questions/{question_id}').get_json()['image']
+    assert image == f'/api/images/{hashlib.sha256(PNG).hexdigest()}.png'
+    assert client.get(image).data == PNG
+
+
+def test_inline_image_is_externalized_on_bulk_import(client, auth_headers):
+    data_uri = 'data:image/png;base64,' + base64.b64encode(PNG).decode()
+    response = client.post('/admin/questions/bulk', headers=auth_headers, json=[{
+        'quiz_id': 2, 'position': 16, 'text': 'Importée avec image', 'image': data_uri,
+        'choices': [{'text': 'A', 'is_correct': True}, {'text': 'B'}],
+    }])
+    assert response.get_json() == {'inserted': 1, 'errors': []}
+
+    image = client.get('/api/questions?quiz_id=2&fields=image').get_json()[-1]['image']
+    assert image == f'/api/images/{hashlib.sha256(PNG).hexdigest()}.png'
+    assert client.get(image).data == PNG
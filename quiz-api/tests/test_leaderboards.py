@@ -0,0 +1,149 @@
+"""Classements: synchronisation entre processus, vue par joueur, curseurs, périodes."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Attempt
+from leaderboard import bump_attempts_version
+from attempt_writer import PendingAttempt, _write_batch
+
+START = datetime(2025, 3, 14, 12, 0)
+
+
+@pytest.fixture(params=['memory', 'sql'])
+def mode(request, app):
+    """Les deux implémentations: structure en mémoire ou requêtes SQL."""
+    app.config['LEADERBOARD_IN_MEMORY'] = request.param == 'memory'
+    return request.param
+
+
+def _attempts(app, rows, quiz_id=1):
+    """Écrit des tentatives (joueur, score, temps, minutes après START) avec leurs rollups.
+
+    Comme un autre processus: le classement en mémoire de l'application
+    n'en est pas informé.
+    """
+    batch = []
+    for player_name, score, time_spent, minutes in rows:
+        pending = PendingAttempt(quiz_id, player_name, 15, score, time_spent, [])
+        pending.created_at = START + timedelta(minutes=minutes)
+        batch.append(pending)
+    with app.app_context():
+        return _write_batch(batch)
+
+
+def _players(client):
+    return [entry['player_name'] for entry in client.get('/api/leaderboard/1').get_json()]
+
+
+def test_in_memory_leaderboard_sees_other_processes(app, client):
+    client.post('/api/attempts', json={'quiz_id': 1, 'player_name': 'alice', 'answers': []})
+    assert _players(client) == ['alice']
+
+    _attempts(app, [('bob', 10, 30, 0)])
+    assert _players(client) == ['bob', 'alice']
+    assert client.get('/api/leaderboard/1/rank/bob').get_json()['rank'] == 1
+
+    # Purge par un autre processus: jeton attempts.version changé avec la suppression
+    with app.app_context():
+        db.session.execute(db.delete(Attempt).where(Attempt.player_name == 'bob'))
+        bump_attempts_version()
+        db.session.commit()
+    assert _players(client) == ['alice']
+    assert client.get('/api/leaderboard/1/rank/bob').status_code == 404
+
+
+PLAYERS = [('alice', 8, 30, 0), ('alice', 5, 10, 1), ('bob', 8, 20, 2), ('carol', 3, 40, 3), ('dave', 8, 30, 4)]
+
+
+def test_players_leaderboard_keeps_each_best_attempt(app, client, mode):
+    _attempts(app, PLAYERS)
+    players = client.get('/api/leaderboard/1/players').get_json()
+    assert [(p['rank'], p['player_name'], p['score']) for p in players] == [
+        (1, 'bob', 8), (2, 'alice', 8), (3, 'dave', 8), (4, 'carol', 3),
+    ]
+    assert [p['player_name'] for p in client.get('/api/leaderboard/1/players?limit=2').get_json()] == ['bob', 'alice']
+
+
+def test_player_rank_and_neighbours(app, client, mode):
+    _attempts(app, PLAYERS)
+    result = client.get('/api/leaderboard/1/rank/alice?around=1').get_json()
+    assert (result['rank'], result['total_players']) == (2, 4)
+    assert (result['best']['score'], result['best']['time_spent']) == (8, 30)
+    assert [(p['rank'], p['player_name']) for p in result['around']] == [(1, 'bob'), (2, 'alice'), (3, 'dave')]
+
+    assert client.get('/api/leaderboard/1/rank/zoe').status_code == 404
+    assert client.get('/api/leaderboard/2/rank/alice').status_code == 404
+
+
+def _walk(client, url, limit):
+    """Toutes les entrées d'un classement, page par page via X-Next-Cursor."""
+    entries, cursor = [], None
+    while True:
+        response = client.get(f'{url}?limit={limit}' + (f'&cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page) <= limit
+        entries.extend(page)
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            return entries
+
+
+@pytest.mark.parametrize('url', ['/api/leaderboard/1', '/api/leaderboard'])
+def test_cursor_pages_match_in_memory_and_sql(app, client, url):
+    # Nombreux ex æquo sur (score, temps, date): seul l'id les départage
+    rows = [(f'p{index}', index % 3, 10 * (index % 2), index % 4) for index in range(20)]
+    _attempts(app, rows)
+    _attempts(app, rows[:5], quiz_id=2)
+
+    walks = {}
+    for in_memory in (True, False):
+        app.config['LEADERBOARD_IN_MEMORY'] = in_memory
+        walks[in_memory] = _walk(client, url, limit=3)
+    assert walks[True] == walks[False]
+
+    entries = walks[True]
+    assert len(entries) == (20 if url.endswith('/1') else 25)
+    assert len({entry['id'] for entry in entries}) == len(entries)
+    keys = [(-entry['score'], entry['time_spent'], entry['created_at'], entry['id']) for entry in entries]
+    assert keys == sorted(keys)
+
+
+def test_invalid_cursor_is_rejected(client, mode):
+    assert client.get('/api/leaderboard/1?cursor=not-a-cursor').status_code == 400
+
+
+@pytest.mark.parametrize('window, bucket', [('day', '2025-03-14'), ('week', '2025-W11'), ('month', '2025-03')])
+def test_closed_window_is_cached_for_a_bounded_time(app, client, window, bucket):
+    _attempts(app, PLAYERS)
+    _attempts(app, [('erin', 9, 10, 60 * 24 * 40)])  # 40 jours plus tard: autres périodes
+
+    response = client.get(f'/api/leaderboard/1?window={window}&bucket={bucket}')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, max-age=300'
+    entries = response.get_json()
+    assert [(e['player_name'], e['score'], e['attempts_count']) for e in entries] == [
+        ('bob', 8, 1), ('alice', 8, 2), ('dave', 8, 1), ('carol', 3, 1),
+    ]
+
+    revalidated = client.get(f'/api/leaderboard/1?window={window}&bucket={bucket}',
+                             headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+def test_current_and_all_time_windows_are_not_cached(app, client):
+    _attempts(app, PLAYERS)
+    client.post('/api/attempts', json={'quiz_id': 1, 'player_name': 'erin', 'answers': []})
+
+    current = client.get('/api/leaderboard/1?window=day')
+    assert [e['player_name'] for e in current.get_json()] == ['erin']
+    assert 'public' not in current.headers.get('Cache-Control', '')
+
+    all_time = client.get('/api/leaderboard/1?window=all').get_json()
+    assert [e['player_name'] for e in all_time] == ['bob', 'alice', 'dave', 'carol', 'erin']
+
+
+@pytest.mark.parametrize('query', ['window=year', 'window=day&bucket=2025-W11', 'window=week&bucket=2025-03'])
+def test_invalid_window_or_bucket_is_rejected(client, query):
+    assert client.get(f'/api/leaderboard/1?{query}').status_code == 400
@@ -0,0 +1,67 @@
+"""Garde-fous N+1: le nombre de requêtes SQL des endpoints chauds ne dépend pas
+du nombre de questions ou de réponses."""
+import pytest
+
+
+def _add_questions(client, auth_headers, quiz_id, count):
+    for index in range(count):
+        response = client.post('/api/questions', headers=auth_headers, json={
+            'quiz_id': quiz_id,
+            'text': f'Question ajoutée {index}',
+            'choices': [{'text': 'A', 'is_correct': True}, {'text': 'B'}, {'text': 'C'}],
+        })
+        assert response.status_code == 200
+
+
+def _statements(client, count_queries, method, url, **kwargs):
+    with count_queries() as statements:
+        response = getattr(client, method)(url, **kwargs)
+    assert response.status_code < 300, response.get_data(as_text=True)
+    return statements
+
+
+@pytest.mark.parametrize('url', [
+    '/api/quizzes/1/questions',
+    '/api/questions?quiz_id=1',
+    '/api/questions',
+    '/api/questions?quiz_id=1&limit=10',
+])
+def test_question_listing_query_count_is_constant(client, auth_headers, count_queries, url):
+    before = _statements(client, count_queries, 'get', url)
+    _add_questions(client, auth_headers, 1, 20)
+    after = _statements(client, count_queries, 'get', url)
+
+    assert len(after) == len(before), after
+    # existence du quiz, questions, choix de toutes les questions en une requête
+    assert len(after) <= 3, after
+
+
+def _participation(client):
+    total = len(client.get('/api/quizzes/1/questions').get_json())
+    return {'playerName': 'alice', 'quizId': 1, 'answers': [1] * total}
+
+
+def _attempt(client):
+    questions = client.get('/api/quizzes/1/questions').get_json()
+    return {
+        'quiz_id': 1,
+        'player_name': 'bob',
+        'answers': [{'question_id': q['id'], 'choice_id': q['possibleAnswers'][0]['id']} for q in questions],
+    }
+
+
+@pytest.mark.parametrize('url, payload', [
+    ('/api/participations', _participation),
+    ('/api/attempts', _attempt),
+])
+def test_submission_query_count_is_constant(client, auth_headers, count_queries, url, payload):
+    # Premier envoi: compilation du corrigé, hors mesure
+    _statements(client, count_queries, 'post', url, json=payload(client))
+    before = _statements(client, count_queries, 'post', url, json=payload(client))
+    _add_questions(client, auth_headers, 1, 20)
+    _statements(client, count_queries, 'post', url, json=payload(client))
+    after = _statements(client, count_queries, 'post', url, json=payload(client))
+
+    assert len(after) == len(before), after
+    # Réponses écrites en un seul executemany
+    assert sum(statement.startswith('INSERT INTO answers') for statement in after) == 1, after
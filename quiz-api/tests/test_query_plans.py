@@ -0,0 +1,10 @@
+"""Plans d'exécution des requêtes chaudes (voir query_plans.HOT_QUERIES)."""
+import pytest
+
+from query_plans import HOT_QUERIES, check_query_plan
+
+
+@pytest.mark.parametrize('label, sql, index_name', HOT_QUERIES, ids=[label for label, _, _ in HOT_QUERIES])
+def test_hot_query_uses_its_index(app, label, sql, index_name):
+    with app.app_context():
+        assert check_query_plan(label, sql, index_name) is None
@@ -0,0 +1,16 @@
+"""Import en masse: chaque question reçoit ses propres choix."""
+
+
+def test_bulk_import_pairs_choices_with_their_question(client, auth_headers):
+    payload = [
+        {'quiz_id': 3, 'position': 16 + index, 'text': f'Importée {index}',
+         'choices': [{'text': f'Bonne {index}', 'is_correct': True}, {'text': f'Fausse {index}'}]}
+        for index in range(20)
+    ]
+    response = client.post('/admin/questions/bulk', headers=auth_headers, json=payload)
+    assert response.get_json() == {'inserted': 20, 'errors': []}
+
+    imported = client.get('/api/questions?quiz_id=3').get_json()[15:]
+    assert [(q['text'], [c['text'] for c in q['choices']]) for q in imported] == [
+        (item['text'], [c['text'] for c in item['choices']]) for item in payload
+    ]
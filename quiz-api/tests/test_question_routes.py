@@ -0,0 +1,151 @@
+"""Routes des questions: choix réordonnés, PATCH par lot, listing projeté et paginé."""
+
+
+def _question(client, question_id):
+    return client.get(f'/api/questions/{question_id}').get_json()
+
+
+def _answer(client, question):
+    """Enregistre une réponse au premier choix de `question`; retourne l'id de la tentative."""
+    response = client.post('/api/attempts', json={
+        'quiz_id': question['quiz_id'],
+        'player_name': 'alice',
+        'answers': [{'question_id': question['id'], 'choice_id': question['choices'][0]['id']}],
+    })
+    assert response.status_code == 201, response.get_data(as_text=True)
+    return response.get_json()['id']
+
+
+def _answered_choice(client, attempt_id):
+    answer = client.get(f'/api/attempts/{attempt_id}/review').get_json()['answers'][0]
+    choice = next(c for c in answer['question']['choices'] if c['id'] == answer['choice_id'])
+    return choice['text'], choice['is_correct'], answer['is_correct']
+
+
+def test_reordering_choices_keeps_recorded_answers(client, auth_headers):
+    question = _question(client, 1)
+    attempt_id = _answer(client, question)
+    before = _answered_choice(client, attempt_id)
+
+    reordered = [question['choices'][i] for i in (1, 0, 2, 3)]
+    response = client.put('/api/questions/1', headers=auth_headers, json={'choices': reordered})
+    assert response.status_code == 204, response.get_data(as_text=True)
+
+    after = _question(client, 1)
+    assert [c['id'] for c in after['choices']] == [c['id'] for c in reordered]
+    assert [c['text'] for c in after['choices']] == [c['text'] for c in reordered]
+    assert _answered_choice(client, attempt_id) == before
+
+
+def test_reordering_choices_by_text_keeps_ids(client, auth_headers):
+    question = _question(client, 2)
+    reordered = [{'text': c['text'], 'is_correct': c['is_correct']} for c in reversed(question['choices'])]
+
+    response = client.patch('/api/questions', headers=auth_headers,
+                            json={'questions': [{'id': 2, 'choices': reordered}]})
+    assert response.status_code == 200
+    assert response.get_json()['updated'] == [{'id': 2, 'fields': ['choices']}]
+    assert [c['id'] for c in _question(client, 2)['choices']] == [c['id'] for c in reversed(question['choices'])]
+
+
+def test_answered_choice_is_never_rewritten(client, auth_headers):
+    question = _question(client, 1)
+    _answer(client, question)
+    answered = question['choices'][0]
+    edited = [dict(answered, text='Autre réponse')] + question['choices'][1:]
+
+    response = client.put('/api/questions/1', headers=auth_headers, json={'choices': edited})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == f"Cannot modify choices with recorded answers: {answered['id']}"
+
+    response = client.put('/api/questions/1', headers=auth_headers, json={'choices': question['choices'][1:]})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == f"Cannot delete choices with recorded answers: {answered['id']}"
+    assert _question(client, 1)['choices'] == question['choices']
+
+
+def _ids(client, quiz_id=1):
+    return [q['id'] for q in client.get(f'/api/quizzes/{quiz_id}/questions').get_json()]
+
+
+def test_batch_patch_updates_only_changed_fields(client, auth_headers):
+    ids = _ids(client)
+    first = _question(client, ids[0])
+    response = client.patch('/api/questions', headers=auth_headers, json={'questions': [
+        {'id': ids[0], 'title': 'Nouveau titre', 'text': first['text']},
+        {'id': ids[4], 'position': 2},
+        {'id': ids[6], 'title': _question(client, ids[6])['title']},
+        {'id': ids[7], 'choices': [{'text': 'Oui', 'is_correct': True}, {'text': 'Non'}]},
+    ]})
+    assert response.status_code == 200
+    assert response.get_json() == {
+        'updated': [{'id': ids[0], 'fields': ['title']}, {'id': ids[4], 'fields': ['position']},
+                    {'id': ids[7], 'fields': ['choices']}],
+        'unchanged': 1,
+    }
+    assert _question(client, ids[0])['title'] == 'Nouveau titre'
+    assert _ids(client) == [ids[0], ids[4]] + ids[1:4] + ids[5:]
+    assert [(c['text'], c['is_correct']) for c in _question(client, ids[7])['choices']] == [('Oui', True), ('Non', False)]
+
+
+def test_batch_patch_is_all_or_nothing(client, auth_headers):
+    ids = _ids(client)
+    question = _question(client, ids[1])
+    _answer(client, question)
+    response = client.patch('/api/questions', headers=auth_headers, json=[
+        {'id': ids[0], 'title': 'Jamais écrit'},
+        {'id': ids[1], 'choices': question['choices'][1:]},
+    ])
+    assert response.status_code == 400
+    assert _question(client, ids[0])['title'] != 'Jamais écrit'
+    assert _question(client, ids[1])['choices'] == question['choices']
+
+
+def test_batch_patch_validation(client, auth_headers):
+    ids = _ids(client)
+    cases = [
+        ({'questions': 'nope'}, 400),
+        ([{'title': 'sans id'}], 400),
+        ([{'id': ids[0]}, {'id': ids[0]}], 400),
+        ([{'id': ids[0], 'position': 16}], 400),
+        ([{'id': ids[0], 'position': '2'}], 400),
+        ([{'id': ids[0], 'position': True}], 400),
+        ([{'id': ids[0]}, {'id': 9999}], 404),
+    ]
+    for body, status in cases:
+        assert client.patch('/api/questions', headers=auth_headers, json=body).status_code == status, body
+    assert _ids(client) == ids
+
+
+def test_fields_projection(client):
+    full = client.get('/api/questions?quiz_id=1').get_json()
+
+    sparse = client.get('/api/questions?quiz_id=1&fields=id,title,image').get_json()
+    assert sparse == [{'id': q['id'], 'title': q['title'], 'image': q['image']} for q in full]
+
+    with_choices = client.get('/api/quizzes/1/questions?fields=id,choices').get_json()
+    assert with_choices == [{'id': q['id'], 'choices': q['choices']} for q in full]
+    assert not any(c['is_correct'] for q in with_choices for c in q['choices'])
+
+
+def test_unknown_or_empty_fields_are_rejected(client):
+    response = client.get('/api/questions?fields=id,is_correct,explanation')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Unknown fields: is_correct, explanation'
+    assert client.get('/api/questions?fields=,').status_code == 400
+
+
+def test_listing_pages_only_on_request(client):
+    response = client.get('/api/questions')
+    assert len(response.get_json()) == 45
+    assert 'X-Next-Cursor' not in response.headers
+
+    ids, cursor = [], None
+    while True:
+        response = client.get('/api/questions?limit=7&fields=id' + (f'&cursor={cursor}' if cursor else ''))
+        ids.extend(q['id'] for q in response.get_json())
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+    assert ids == [q['id'] for q in client.get('/api/questions').get_json()]
+    assert client.get('/api/questions?cursor=not-a-cursor').status_code == 400
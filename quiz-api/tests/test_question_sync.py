@@ -0,0 +1,49 @@
+"""Synchronisation des imports de référence (seed): questions hors source et choix."""
+import json
+
+from models import db, Question, Choice
+from question_import import sync_questions
+from seed import SEED_SOURCE, find_questions_file, seed_database, seed_rows
+
+
+def _seed_rows():
+    with open(find_questions_file(), encoding='utf-8') as f:
+        return seed_rows(json.load(f))
+
+
+def _positions(quiz_id):
+    return [(q.position, q.source) for q in Question.query.filter_by(quiz_id=quiz_id).order_by(Question.position)]
+
+
+def test_seed_moves_manual_questions_out_of_the_way(app, client, auth_headers):
+    response = client.post('/api/questions', headers=auth_headers, json={
+        'quiz_id': 1, 'position': 3, 'text': 'Question manuelle',
+        'choices': [{'text': 'Oui', 'is_correct': True}, {'text': 'Non'}],
+    })
+    manual_id = response.get_json()['id']
+
+    with app.app_context():
+        report = seed_database(force=True)
+        assert {'question': 'quiz 1 #3', 'fields': ['position']} in report['updated']
+        assert report['deleted'] == []
+        manual = db.session.get(Question, manual_id)
+        assert (manual.position, manual.source) == (16, None)
+        assert _positions(1) == [(position, SEED_SOURCE) for position in range(1, 16)] + [(16, None)]
+        # Rejouer le seed ne change plus rien
+        assert seed_database(force=True)['updated'] == []
+
+
+def test_sync_matches_choices_by_text(app):
+    with app.app_context():
+        rows = _seed_rows()
+        question = Question.query.filter_by(external_id=rows[0]['external_id']).one()
+        before = {c.text: (c.id, c.is_correct) for c in question.choices}
+        rows[0] = dict(rows[0], choices=list(reversed(rows[0]['choices'])))
+
+        report = sync_questions(rows, [1, 2, 3], SEED_SOURCE)
+        db.session.commit()
+
+        assert report['updated'] == [{'question': rows[0]['external_id'], 'fields': ['choices']}]
+        choices = Choice.query.filter_by(question_id=question.id).order_by(Choice.position).all()
+        assert [c.text for c in choices] == [c['text'] for c in rows[0]['choices']]
+        assert {c.text: (c.id, c.is_correct) for c in choices} == before
@@ -0,0 +1,46 @@
+"""Ordre des questions: PUT /order, déplacements et suppressions décalent les positions."""
+
+
+def _order(client, quiz_id=1):
+    return [(q['position'], q['id']) for q in client.get(f'/api/quizzes/{quiz_id}/questions').get_json()]
+
+
+def _ids(client, quiz_id=1):
+    return [question_id for _, question_id in _order(client, quiz_id)]
+
+
+def test_put_order_renumbers_the_whole_quiz(client, auth_headers):
+    ids = list(reversed(_ids(client)))
+    response = client.put('/api/quizzes/1/order', headers=auth_headers, json={'question_ids': ids})
+    assert response.status_code == 204
+    assert _order(client) == list(enumerate(ids, start=1))
+    # Les autres quizzes ne bougent pas
+    assert _ids(client, 2) == sorted(_ids(client, 2))
+
+
+def test_put_order_requires_every_question_once(client, auth_headers):
+    ids = _ids(client)
+    for body in ({'question_ids': ids[:-1]}, {'question_ids': ids + ids[:1]}, {'question_ids': ids[:-1] + [9999]},
+                 {'question_ids': 'nope'}):
+        response = client.put('/api/quizzes/1/order', headers=auth_headers, json=body)
+        assert response.status_code == 400, body
+    assert _ids(client) == ids
+    assert client.put('/api/quizzes/99/order', headers=auth_headers, json=ids).status_code == 404
+
+
+def test_moves_inserts_and_deletes_shift_positions(client, auth_headers):
+    ids = _ids(client)
+    # Question 10 déplacée en 3: les questions 3..9 descendent d'un rang
+    assert client.put(f'/api/questions/{ids[9]}', headers=auth_headers, json={'position': 3}).status_code == 204
+    expected = ids[:2] + [ids[9]] + ids[2:9] + ids[10:]
+    assert _ids(client) == expected
+
+    created = client.post('/api/questions', headers=auth_headers, json={
+        'quiz_id': 1, 'position': 1, 'text': 'Première', 'choices': [{'text': 'A', 'is_correct': True}],
+    }).get_json()['id']
+    expected = [created] + expected
+    assert _ids(client) == expected
+
+    assert client.delete(f'/api/questions/{expected[5]}', headers=auth_headers).status_code == 204
+    expected = expected[:5] + expected[6:]
+    assert _order(client) == list(enumerate(expected, start=1))
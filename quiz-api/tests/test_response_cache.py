@@ -0,0 +1,46 @@
+"""Cache de réponses: 304 sans accès à la base, écritures des autres processus."""
+import pytest
+
+from models import db, AppMeta
+from cache import response_cache
+
+URL = '/api/quizzes/1/questions'
+
+
+@pytest.fixture
+def cached_app(app):
+    app.config['RESPONSE_CACHE_ENABLED'] = True
+    app.config['RESPONSE_CACHE_VERSION_CHECK_SECONDS'] = 0
+    # Cache global au module: repartir de la base de cette application
+    response_cache.invalidate()
+    return app
+
+
+def test_not_modified_reads_at_most_the_version(cached_app, client, count_queries):
+    etag = client.get(URL).headers['ETag']
+
+    with count_queries() as statements:
+        response = client.get(URL, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert len(statements) == 1 and 'app_meta' in statements[0], statements
+
+    cached_app.config['RESPONSE_CACHE_VERSION_CHECK_SECONDS'] = 60
+    client.get(URL, headers={'If-None-Match': etag})
+    with count_queries() as statements:
+        response = client.get(URL, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert statements == []
+
+
+def test_other_process_writes_are_seen_after_the_interval(cached_app, client):
+    body = client.get(URL).get_json()
+
+    # Question ajoutée par un autre processus: seul le jeton en base le signale
+    with cached_app.app_context():
+        db.session.execute(db.text(
+            "INSERT INTO questions (quiz_id, position, title, text) VALUES (1, 16, 'Autre', 'Autre')"
+        ))
+        AppMeta.bump_content_version()
+        db.session.commit()
+
+    assert len(client.get(URL).get_json()) == len(body) + 1